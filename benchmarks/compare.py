@@ -0,0 +1,43 @@
+"""Compare two benchmark JSON files stage by stage.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 1.1]
+
+Exits with status 1 when any stage got slower than the threshold ratio.
+"""
+import argparse
+import json
+import sys
+
+def _index(report):
+    return {(r["stage"], r["size"]): r for r in report["results"] if "seconds" in r}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=1.1,
+                        help="Slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    old, new = _index(baseline), _index(candidate)
+    print(f"{'stage':<24}{'size':>10}{'baseline':>12}{'candidate':>12}{'ratio':>8}")
+    regressions = 0
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (k[1], k[0])):
+        before, after = old[key]["seconds"], new[key]["seconds"]
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            regressions += 1
+            flag = "  slower"
+        print(f"{key[0]:<24}{key[1]:>10}{before:>12.4f}{after:>12.4f}{ratio:>8.2f}{flag}")
+    print(f"{baseline.get('commit')} -> {candidate.get('commit')}: {regressions} regression(s)")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Seeded generator for realistic source/target dataset pairs.
+
+The target is derived from the source so that every source row has a true
+partner, then noise is applied: typos and case changes in names, repeated
+keys, shuffled row order and extra unmatched rows.
+"""
+from dataclasses import dataclass
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = np.array([
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda",
+    "David", "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+    "Thomas", "Sarah", "Charles", "Karen", "Christopher", "Lisa", "Daniel", "Nancy",
+])
+LAST_NAMES = np.array([
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+    "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson", "White",
+])
+CITIES = np.array([
+    "New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia",
+    "San Antonio", "San Diego", "Dallas", "Austin", "Jacksonville", "Columbus",
+])
+
+@dataclass
+class NoiseConfig:
+    typo_rate: float = 0.1  # share of target names with one edit
+    case_rate: float = 0.1  # share of target names with changed case
+    duplicate_rate: float = 0.05  # share of source ids reused by another row
+    extra_target_rate: float = 0.1  # unmatched rows added to the target
+
+def _add_typos(values: np.ndarray, rate: float, rng: np.random.Generator) -> np.ndarray:
+    values = values.copy()
+    picked = np.flatnonzero(rng.random(len(values)) < rate)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    positions = rng.random(len(picked))
+    edits = rng.integers(0, 3, len(picked))
+    replacements = rng.integers(0, len(letters), len(picked))
+    for i, pos, edit, letter in zip(picked, positions, edits, replacements):
+        value = values[i]
+        at = int(pos * len(value))
+        if edit == 0:  # substitution
+            value = value[:at] + letters[letter] + value[at + 1:]
+        elif edit == 1:  # deletion
+            value = value[:at] + value[at + 1:]
+        else:  # insertion
+            value = value[:at] + letters[letter] + value[at:]
+        values[i] = value
+    return values
+
+def _change_case(values: np.ndarray, rate: float, rng: np.random.Generator) -> np.ndarray:
+    values = values.copy()
+    picked = rng.random(len(values)) < rate
+    upper = picked & (rng.random(len(values)) < 0.5)
+    values[upper] = np.char.upper(values[upper].astype(str))
+    lower = picked & ~upper
+    values[lower] = np.char.lower(values[lower].astype(str))
+    return values
+
+def generate_source(rows: int, seed: int = 0, noise: NoiseConfig = NoiseConfig()) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ids = np.arange(rows)
+    duplicated = rng.random(rows) < noise.duplicate_rate
+    ids[duplicated] = rng.integers(0, max(rows, 1), int(duplicated.sum()))
+    names = np.char.add(np.char.add(rng.choice(FIRST_NAMES, rows), " "), rng.choice(LAST_NAMES, rows))
+    dates = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D")
+    return pd.DataFrame({
+        "customer_id": ids.astype(str),
+        "name": names.astype(object),
+        "city": rng.choice(CITIES, rows).astype(object),
+        "amount": np.round(rng.gamma(2.0, 150.0, rows), 2),
+        "order_date": dates.strftime("%m/%d/%Y"),
+    })
+
+def generate_pair(rows: int, seed: int = 0,
+                  noise: NoiseConfig = NoiseConfig()) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Source frame with `rows` rows and a noisy, shuffled target built from it"""
+    rng = np.random.default_rng(seed + 1)
+    source = generate_source(rows, seed, noise)
+
+    extra = generate_source(int(rows * noise.extra_target_rate), seed + 2, noise)
+    extra["customer_id"] = "X" + extra["customer_id"]
+    names = np.concatenate([source["name"].to_numpy(dtype=object), extra["name"].to_numpy(dtype=object)])
+    names = _change_case(_add_typos(names, noise.typo_rate, rng), noise.case_rate, rng)
+    target = pd.DataFrame({
+        "id": np.concatenate([source["customer_id"].to_numpy(dtype=object),
+                              extra["customer_id"].to_numpy(dtype=object)]),
+        "full_name": names,
+        "region": np.concatenate([source["city"].to_numpy(dtype=object), extra["city"].to_numpy(dtype=object)]),
+        "balance": np.round(rng.normal(1000.0, 250.0, len(names)), 2),
+    })
+    order = rng.permutation(len(target))
+    return source, target.iloc[order].reset_index(drop=True)
@@ -0,0 +1,182 @@
+"""Time the import, match, transform, export and preview stages.
+
+Usage:
+    python -m benchmarks.run --rows 1000 100000 --output bench.json
+
+Results are written as JSON so runs from different commits can be compared
+with `python -m benchmarks.compare old.json new.json`.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from src.data_model import DataTransformer
+from src.file_io import export_frame, read_data_file
+from src.rules import MatchRule, TransformRule
+from .generate import generate_pair
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).resolve().parent, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def _time(func: Callable[..., Any], repeat: int, setup: Optional[Callable[[], Any]] = None):
+    """Best wall time over `repeat` runs and the last result.
+
+    With setup, each run is passed a new object from it, built outside the
+    timed region, so repeats never hit caches filled by the previous run.
+    """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def _transformer(match_rules: List[MatchRule], transform_rules: List[TransformRule] = ()) -> DataTransformer:
+    """A transformer with empty match, normalization, blocking and transform caches"""
+    transformer = DataTransformer()
+    transformer.match_rules = list(match_rules)
+    transformer.transform_rules = list(transform_rules)
+    return transformer
+
+def _record(results: List[Dict], stage: str, rows: int, seconds: float, **extra):
+    results.append({
+        "stage": stage,
+        "rows": rows,
+        "seconds": round(seconds, 6),
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+        **extra,
+    })
+
+def _preview_stage(df: pd.DataFrame, rows: int, results: List[Dict], repeat: int):
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtCore import Qt
+        from PyQt6.QtWidgets import QApplication
+        from src.gui.data_preview import PandasTableModel
+    except ImportError as e:
+        results.append({"stage": "preview", "rows": rows, "skipped": str(e)})
+        return
+
+    app = QApplication.instance() or QApplication([])
+    visible = min(rows, 10_000)
+
+    def scroll():
+        model = PandasTableModel(df)
+        for row in range(visible):
+            for col in range(model.columnCount()):
+                index = model.index(row, col)
+                model.data(index)
+                model.data(index, Qt.ItemDataRole.BackgroundRole)
+        return model
+
+    seconds, _ = _time(scroll, repeat)
+    _record(results, "preview", visible, seconds, cells=visible * df.shape[1])
+    app.processEvents()
+
+def run_size(rows: int, seed: int, fuzzy_rows: int, repeat: int, workdir: Path) -> List[Dict]:
+    results: List[Dict] = []
+    source, target = generate_pair(rows, seed)
+
+    csv_path = workdir / f"source_{rows}.csv"
+    source.to_csv(csv_path, index=False)
+    seconds, source = _time(lambda: read_data_file(str(csv_path)), repeat)
+    _record(results, "import_csv", rows, seconds, bytes=csv_path.stat().st_size)
+
+    exact_rules = [MatchRule("customer_id", "id", "exact")]
+    seconds, matched = _time(lambda transformer: transformer.match_records(source, target), repeat,
+                             lambda: _transformer(exact_rules))
+    _record(results, "match_exact", rows, seconds, matches=len(matched), target_rows=len(target))
+
+    # Dense fuzzy matching is quadratic, so it runs on a bounded sample
+    sample_source = source.head(fuzzy_rows)
+    sample_target = target.head(fuzzy_rows)
+    fuzzy_cases = {
+        "match_fuzzy": [MatchRule("name", "full_name", "fuzzy", 0.85)],
+        "match_fuzzy_blocked": [MatchRule("name", "full_name", "fuzzy", 0.85, blocking="qgram",
+                                          blocking_params={"min_shared": 3})],
+        "match_exact_and_fuzzy": [MatchRule("city", "region", "exact", 0.9),
+                                  MatchRule("name", "full_name", "fuzzy", 0.9)],
+    }
+    for stage, rules in fuzzy_cases.items():
+        seconds, (transformer, fuzzy_matched) = _time(
+            lambda transformer: (transformer, transformer.match_records(sample_source, sample_target)),
+            repeat, lambda: _transformer(rules))
+        extra = {"pairs_scored": transformer.pairs_scored, "strategy": transformer.last_plan.strategy}
+        if any(rule.blocking for rule in rules):
+            # Share of the brute-force matches that blocking still finds
+            recall = transformer.blocking_recall(sample_source, sample_target)
+            extra.update(recall=round(recall["recall"], 4), baseline_matches=recall["baseline_matches"])
+        _record(results, stage, len(sample_source), seconds, matches=len(fuzzy_matched),
+                target_rows=len(sample_target), **extra)
+
+    transform_rules = [
+        TransformRule(["order_date"], "order_date_iso", "date_format",
+                      {"source_format": "%m/%d/%Y", "target_format": "%Y-%m-%d"}),
+        TransformRule(["amount"], "amount_rounded", "number_format", {"decimals": 0}),
+        TransformRule(["name", "city"], "label", "concatenate", {"separator": " / "}),
+    ]
+    seconds, transformed = _time(lambda transformer: transformer.apply_transformations(matched), repeat,
+                                 lambda: _transformer(exact_rules, transform_rules))
+    _record(results, "transform", len(matched), seconds)
+
+    out_path = workdir / f"export_{rows}.csv"
+    seconds, _ = _time(lambda: export_frame(transformed, str(out_path)), repeat)
+    _record(results, "export_csv", len(transformed), seconds, bytes=out_path.stat().st_size)
+
+    _preview_stage(transformed, len(transformed), results, repeat)
+    for result in results:
+        result["size"] = rows
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="Source sizes to benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fuzzy-rows", type=int, default=2_000,
+                        help="Rows per side used for the quadratic fuzzy stages")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage; the best time is kept")
+    parser.add_argument("--output", help="JSON file to write; defaults to stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            print(f"Benchmarking {rows} rows...", file=sys.stderr)
+            report["results"].extend(run_size(rows, args.seed, min(args.fuzzy_rows, rows),
+                                              args.repeat, Path(tmp)))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+import pandas as pd
+
+BLOCKING_METHODS = ["qgram", "sorted_neighbourhood", "prefix", "phonetic"]
+
+def _group_positions(keys: Iterable[str]) -> Dict[str, np.ndarray]:
+    """Map each key to the ascending row positions that carry it"""
+    codes, uniques = pd.factorize(pd.Series(list(keys), dtype=object))
+    order = np.argsort(codes, kind='stable')
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    groups = np.split(order, bounds) if len(order) else []
+    return {uniques[codes[group[0]]]: group for group in groups}
+
+def soundex(value: str) -> str:
+    """American Soundex code, used as a phonetic blocking key"""
+    letters = [c for c in value.upper() if c.isalpha()]
+    if not letters:
+        return ''
+    mapping = {}
+    for digit, chars in (('1', 'BFPV'), ('2', 'CGJKQSXZ'), ('3', 'DT'),
+                         ('4', 'L'), ('5', 'MN'), ('6', 'R')):
+        for char in chars:
+            mapping[char] = digit
+    code = letters[0]
+    previous = mapping.get(letters[0], '')
+    for char in letters[1:]:
+        digit = mapping.get(char, '')
+        if digit and digit != previous:
+            code += digit
+        if char not in 'HW':
+            previous = digit
+    return (code + '000')[:4]
+
+class CandidateIndex:
+    """Index over a target column that proposes plausible rows for a value"""
+    method = ''
+
+    def __init__(self, values: List[str], **params):
+        self.size = len(values)
+        self.params = params
+
+    def candidates(self, value: str) -> np.ndarray:
+        raise NotImplementedError
+
+class QGramIndex(CandidateIndex):
+    """Inverted lists of q-grams; rows sharing enough grams are candidates"""
+    method = 'qgram'
+
+    def __init__(self, values: List[str], q: int = 3, min_shared: int = 1):
+        super().__init__(values, q=q, min_shared=min_shared)
+        self.q = q
+        self.min_shared = min_shared
+        grams, positions = [], []
+        for pos, value in enumerate(values):
+            for gram in self._grams(value):
+                grams.append(gram)
+                positions.append(pos)
+        groups = _group_positions(grams)
+        positions = np.asarray(positions, dtype=np.int64)
+        self.postings = {gram: positions[group] for gram, group in groups.items()}
+
+    def _grams(self, value: str) -> set:
+        padded = f"{'#' * (self.q - 1)}{value}{'#' * (self.q - 1)}"
+        return {padded[i:i + self.q] for i in range(len(padded) - self.q + 1)}
+
+    def candidates(self, value: str) -> np.ndarray:
+        lists = [self.postings[gram] for gram in self._grams(value) if gram in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        counts = np.bincount(np.concatenate(lists), minlength=self.size)
+        return np.flatnonzero(counts >= self.min_shared)
+
+class SortedNeighbourhoodIndex(CandidateIndex):
+    """Rows whose values sort within a window around the value are candidates"""
+    method = 'sorted_neighbourhood'
+
+    def __init__(self, values: List[str], window: int = 20):
+        super().__init__(values, window=window)
+        self.window = window
+        self.order = np.argsort(np.asarray(values, dtype=object), kind='stable')
+        self.sorted_values = np.asarray(values, dtype=object)[self.order]
+
+    def candidates(self, value: str) -> np.ndarray:
+        center = int(np.searchsorted(self.sorted_values, value))
+        half = max(self.window // 2, 1)
+        return np.sort(self.order[max(center - half, 0):center + half])
+
+class KeyIndex(CandidateIndex):
+    """Rows sharing a derived blocking key with the value are candidates"""
+
+    def __init__(self, values: List[str], **params):
+        super().__init__(values, **params)
+        self.groups = _group_positions(self.key(value) for value in values)
+
+    def key(self, value: str) -> str:
+        raise NotImplementedError
+
+    def candidates(self, value: str) -> np.ndarray:
+        return self.groups.get(self.key(value), np.empty(0, dtype=np.int64))
+
+class PrefixIndex(KeyIndex):
+    method = 'prefix'
+
+    def __init__(self, values: List[str], length: int = 3):
+        self.length = length
+        super().__init__(values, length=length)
+
+    def key(self, value: str) -> str:
+        return value[:self.length]
+
+class PhoneticIndex(KeyIndex):
+    method = 'phonetic'
+
+    def key(self, value: str) -> str:
+        return soundex(value)
+
+_INDEX_TYPES = {
+    cls.method: cls for cls in (QGramIndex, SortedNeighbourhoodIndex, PrefixIndex, PhoneticIndex)
+}
+
+class CandidateIndexCache:
+    """Keeps built indexes so repeated runs over the same column skip the build"""
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, CandidateIndex]" = OrderedDict()
+
+    def get(self, values: pd.Series, method: str, params: Dict[str, Any]) -> CandidateIndex:
+        if method not in _INDEX_TYPES:
+            raise ValueError(f"Unknown blocking method: {method}")
+        row_hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        fingerprint = hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()
+        key = (method, tuple(sorted(params.items())), fingerprint)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        index = _INDEX_TYPES[method](list(values), **params)
+        self._entries[key] = index
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return index
+
+    def clear(self):
+        self._entries.clear()
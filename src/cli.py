@@ -0,0 +1,145 @@
+"""Headless batch runner: match and transform files with a saved rule set.
+
+Usage:
+    python -m src.cli SOURCE TARGET [MORE ...] --rules rules.json --output result.csv
+
+Rules that name files refer to them by file name, as in the GUI.
+
+pandas, rapidfuzz and the matching engine are imported only once the
+arguments are valid, and Qt is never imported.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from .rules import MATCH_MODES, load_rule_set
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Match SOURCE against TARGET with a saved rule set and write the transformed result."
+    )
+    parser.add_argument("source", help="Source data file (.csv, .xlsx, .parquet or .feather)")
+    parser.add_argument("target", help="Target data file (.csv, .xlsx, .parquet or .feather)")
+    parser.add_argument("more", nargs="*", help="Further files joined by match rules that name them")
+    parser.add_argument("-r", "--rules", required=True, help="Rule set JSON saved from the GUI")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.csv, .xlsx, .parquet or .feather)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read the source in chunks and append results to the output")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Source rows per chunk in --stream mode")
+    parser.add_argument("--mode", choices=MATCH_MODES, default="best",
+                        help="best: best target per source row; top_k: the --top-k best with rank and "
+                             "score; left: every source row; outer: every row of both files; "
+                             "anti: target rows no source row matched (default: best)")
+    parser.add_argument("--top-k", type=int, default=3,
+                        help="Candidates per source row in --mode top_k (default: 3)")
+    parser.add_argument("--lean", action="store_true",
+                        help="Load only the columns the rules read; other output columns are read "
+                             "for matched rows only")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse parsed copies of unchanged input files, as the GUI does, "
+                             "and store new ones (not used with --lean or --stream)")
+    parser.add_argument("--compression", default=None,
+                        help="Parquet/Feather codec, e.g. snappy, zstd or lz4 (default: snappy for Parquet)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes that share fuzzy scoring; 0 uses every core (default: 1)")
+    parser.add_argument("--explain", action="store_true",
+                        help="Print the compiled match plan and its run statistics")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print time, rows/s, pairs scored and peak memory of each stage")
+    parser.add_argument("--run-log", default=None,
+                        help="Append the stage statistics of this run to a JSON lines file")
+    parser.add_argument("--profile", default=None,
+                        help="Write cProfile statistics of the run to this file")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print errors")
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    log = (lambda message: None) if args.quiet else (lambda message: print(message, file=sys.stderr))
+
+    try:
+        match_rules, transform_rules = load_rule_set(args.rules)
+    except (OSError, ValueError, TypeError) as e:
+        print(f"Error loading rules from {args.rules}: {e}", file=sys.stderr)
+        return 2
+
+    # Heavy imports are deferred until there is work to do
+    from .data_model import DataTransformer
+    from .file_cache import ParsedFileCache
+    from .file_io import (DEFAULT_CHUNKSIZE, export_frame, read_data_file,
+                          read_files_parallel, read_schema, stream_match_file)
+    from .instrumentation import RunLog, StageStats, profiled
+
+    transformer = DataTransformer()
+    transformer.match_rules = match_rules
+    transformer.transform_rules = transform_rules
+    transformer.match_workers = args.workers or None
+    transformer.match_mode = args.mode
+    transformer.top_k = args.top_k
+    if args.stream and args.more:
+        print("Error: --stream matches a source against a single target file", file=sys.stderr)
+        return 2
+    if args.stream and args.lean:
+        print("Error: --lean cannot be combined with --stream", file=sys.stderr)
+        return 2
+    if args.stream and args.mode in ("outer", "anti"):
+        print(f"Error: --mode {args.mode} needs the whole source and cannot be combined with --stream",
+              file=sys.stderr)
+        return 2
+    if args.top_k < 1:
+        print("Error: --top-k must be at least 1", file=sys.stderr)
+        return 2
+    paths = [args.source, args.target] + args.more
+    if len({Path(path).name for path in paths}) < len(paths):
+        print("Error: input files must have distinct file names", file=sys.stderr)
+        return 2
+    run_log = transformer.run_log = RunLog("stream match" if args.stream else "batch")
+
+    start = time.perf_counter()
+    try:
+        with profiled(args.profile):
+            if args.stream:
+                with run_log.stage("import target") as stats:
+                    target_df = read_data_file(args.target)
+                    stats.rows = len(target_df)
+                rows = stream_match_file(transformer, args.source, target_df, args.output,
+                                         args.chunksize or DEFAULT_CHUNKSIZE, args.compression)
+            else:
+                columns = None
+                if args.lean:
+                    columns = transformer.required_columns({Path(path).name: read_schema(path) for path in paths})
+                frames = {}
+                cache = ParsedFileCache() if args.cache else None
+                for loaded in read_files_parallel(paths, columns=columns, cache=cache):
+                    if loaded.error is not None:
+                        raise RuntimeError(f"Error importing {loaded.path.name}: {loaded.error}")
+                    run_log.add(StageStats(f"import {loaded.path.name}", loaded.seconds, len(loaded.data),
+                                           cached=loaded.cached))
+                    log(f"Loaded {len(loaded.data)} rows: {loaded.summary()}")
+                    frames[loaded.path.name] = loaded.lean if args.lean else loaded.data
+                if args.lean:
+                    result = transformer.match_lean(frames)
+                else:
+                    matched = transformer.match_files(frames)
+                    result = transformer.apply_transformations(matched)
+                with run_log.stage("export", len(result)):
+                    export_frame(result, args.output, compression=args.compression)
+                rows = len(result)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if args.run_log:
+            run_log.append_to(args.run_log)
+
+    if args.stats:
+        print(run_log.summary(), file=sys.stderr)
+    if args.explain and transformer.last_plan is not None:
+        print(transformer.last_plan.explain(), file=sys.stderr)
+    log(f"Wrote {rows} rows to {Path(args.output).name} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
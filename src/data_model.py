@@ -1,94 +1,988 @@
-from dataclasses import dataclass
-from typing import Dict, List, Any, Optional
+import logging
+import os
+import time
+import weakref
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+from .blocking import CandidateIndexCache
+from .file_io import LeanFile
+from .instrumentation import RunLog, record_stage
+from .match_cache import MatchCache, frame_fingerprint, row_hashes, rules_key
+from .match_plan import JoinGraph, MatchPlan
+from .rules import MATCH_MODES, MatchRule, TransformRule
+from .transforms import TransformPipeline
+
+logger = logging.getLogger(__name__)
+
+class OperationCancelled(Exception):
+    """Raised from a progress callback to stop a running operation"""
+
+# Unicode combining marks left behind by NFKD decomposition of accented letters
+COMBINING_MARKS = '[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]'
+# How missing keys of every dtype render, as str() renders NaN
+MISSING_KEY = str(np.nan)
+# Keep the row-wise form of sources with fewer distinct keys than this share of rows
+DEDUP_MAX_RATIO = 0.9
+# Columns top-k matches add: 1 for the match the best mode keeps, and its average score
+MATCH_RANK_COLUMN = 'match_rank'
+MATCH_SCORE_COLUMN = 'match_score'
+
+def normalization(rule: MatchRule) -> Tuple[bool, bool, bool, bool]:
+    """Normalization options of a rule, in the order normalize_column takes them"""
+    return rule.case_sensitive, rule.strip_whitespace, rule.strip_punctuation, rule.remove_accents
+
+def normalize_strings(strings: pd.Series, case_sensitive: bool, strip_whitespace: bool = False,
+                      strip_punctuation: bool = False, remove_accents: bool = False) -> pd.Series:
+    """Apply match rule normalization to a column of strings with vectorized string ops"""
+    if remove_accents:
+        strings = strings.str.normalize('NFKD').str.replace(COMBINING_MARKS, '', regex=True)
+    if not case_sensitive:
+        strings = strings.str.lower()
+    if strip_punctuation:
+        strings = strings.str.replace(r'[^\w\s]|_', '', regex=True)
+    if strip_whitespace:
+        strings = strings.str.strip().str.replace(r'\s+', ' ', regex=True)
+    return strings
+
+def normalize_column(values: pd.Series, case_sensitive: bool, strip_whitespace: bool = False,
+                     strip_punctuation: bool = False, remove_accents: bool = False) -> pd.Series:
+    """Render a column as the strings compared by match rules, normalizing each distinct value once.
+
+    Missing values of every dtype render as MISSING_KEY, so whether null keys
+    match does not depend on how a file's columns happen to be typed.
+    """
+    options = (case_sensitive, strip_whitespace, strip_punctuation, remove_accents)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), pd.Series(values.cat.categories.astype(object))
+    else:
+        if values.dtype == object:
+            # Values of different types can hash alike (1, 1.0, True) yet render differently
+            values = values.map(str, na_action='ignore')
+        codes, uniques = pd.factorize(values)
+        uniques = pd.Series(uniques.astype(object), dtype=object)
+    labels = normalize_strings(uniques.map(str), *options).to_numpy(dtype=object)
+    # Code -1 (missing) picks the trailing label
+    missing = normalize_strings(pd.Series([MISSING_KEY], dtype=object), *options).iloc[0]
+    labels = np.append(labels, np.array([missing], dtype=object))
+    return pd.Series(labels[codes], index=values.index, dtype=object)
+
+def distinct_rows(codes: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Number of each row's distinct combination of codes, and the first row of every combination"""
+    combined = codes[0]
+    for column_codes in codes[1:]:
+        # Both factors stay below the row count, so the product fits in int64
+        combined = pd.factorize(combined * (int(column_codes.max(initial=0)) + 1) + column_codes)[0]
+    if len(codes) == 1 and combined.min(initial=0) >= 0:
+        # Codes from pd.factorize are already numbered in order of first appearance
+        group = combined
+    else:
+        group, _ = pd.factorize(combined)
+    # Groups are numbered in order of first appearance, so first rows come out ascending
+    _, first = np.unique(group, return_index=True)
+    return group, first
+
+def stratified_sample(df: pd.DataFrame, rows: int, seed: int = 0) -> pd.DataFrame:
+    """One random row from each of rows equal slices of df, so every part of the file is represented"""
+    if len(df) <= rows:
+        return df
+    edges = np.linspace(0, len(df), rows + 1).astype(np.int64)
+    offsets = np.random.default_rng(seed).random(rows) * (edges[1:] - edges[:-1])
+    return df.take(edges[:-1] + offsets.astype(np.int64)).reset_index(drop=True)
+
+def key_index(columns: List[pd.Series]) -> pd.Index:
+    """Composite lookup key over one or more normalized columns"""
+    if len(columns) == 1:
+        return pd.Index(columns[0])
+    return pd.MultiIndex.from_arrays(columns)
+
+class NormalizedColumns:
+    """Normalized match columns per frame, shared by every rule and join edge reading them.
+    
+    Entries are dropped with their frame; frames must not be modified in place.
+    """
+    
+    def __init__(self):
+        self._frames: Dict[int, Tuple[weakref.ref, Dict[Tuple, Any]]] = {}
+    
+    def _entries(self, df: pd.DataFrame) -> Dict[Tuple, Any]:
+        key = id(df)
+        entry = self._frames.get(key)
+        if entry is None or entry[0]() is not df:
+            entry = (weakref.ref(df, lambda _: self._frames.pop(key, None)), {})
+            self._frames[key] = entry
+        return entry[1]
+    
+    def column(self, df: pd.DataFrame, column: str, options: Tuple) -> pd.Series:
+        """Column normalized with the options of normalization(rule)"""
+        entries = self._entries(df)
+        key = ('column', column, options)
+        if key not in entries:
+            entries[key] = normalize_column(df[column], *options)
+        return entries[key]
+    
+    def factorized(self, df: pd.DataFrame, column: str, options: Tuple) -> Tuple[np.ndarray, pd.Index]:
+        """Integer codes of a normalized column and the distinct values they index"""
+        entries = self._entries(df)
+        key = ('codes', column, options)
+        if key not in entries:
+            codes, uniques = pd.factorize(self.column(df, column, options))
+            entries[key] = (codes, pd.Index(uniques))
+        return entries[key]
+
+def take_with_missing(df: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+    """Rows of df at positions, renumbered from 0; position -1 gives a row of missing values"""
+    if len(positions) and positions.min() < 0:
+        return df.reset_index(drop=True).reindex(positions).reset_index(drop=True)
+    return df.take(positions).reset_index(drop=True)
+
+def build_joined_frame(parts: List[Tuple[pd.DataFrame, np.ndarray]]) -> pd.DataFrame:
+    """Combine matched row positions of several frames; later frames win for shared column names.
+    
+    Position -1 marks a result row without a row of that frame; such rows keep
+    the earlier frames' values of shared columns.
+    """
+    (first_df, first_pos), rest = parts[0], parts[1:]
+    result = take_with_missing(first_df, first_pos)
+    for df, positions in rest:
+        matched = take_with_missing(df, positions)
+        missing = positions < 0
+        for column in matched.columns:
+            values = matched[column]
+            if column in result.columns and missing.any():
+                # Concatenation finds a common dtype where Series.where would refuse
+                values = pd.concat([values[~missing], result[column][missing]]).sort_index()
+            result[column] = values
+    return result
+
+def build_matched_frame(source_df: pd.DataFrame, target_df: pd.DataFrame,
+                        source_pos: np.ndarray, target_pos: np.ndarray) -> pd.DataFrame:
+    """Combine matched row positions; target values win for shared column names"""
+    return build_joined_frame([(source_df, source_pos), (target_df, target_pos)])
 
 @dataclass
-class MatchRule:
-    source_column: str
-    target_column: str
-    match_type: str  # exact, fuzzy
-    threshold: float = 0.9  # for fuzzy matching
-    case_sensitive: bool = False
+class MatchResult:
+    """Matched row positions with the average score of each match.
+    
+    With several candidates per source row, rows are ordered by source
+    position and then rank, 0 being the match the best mode keeps.
+    """
+    source_pos: np.ndarray
+    target_pos: np.ndarray
+    scores: np.ndarray
+    ranks: Optional[np.ndarray] = None
+    
+    def __post_init__(self):
+        if self.ranks is None:
+            self.ranks = np.zeros(len(self.source_pos), dtype=np.int32)
+    
+    @classmethod
+    def empty(cls) -> 'MatchResult':
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0))
+    
+    def __len__(self):
+        return len(self.source_pos)
+    
+    @classmethod
+    def concat(cls, parts: List['MatchResult']) -> 'MatchResult':
+        if not parts:
+            return cls.empty()
+        return cls(*(np.concatenate([getattr(part, field) for part in parts])
+                     for field in ('source_pos', 'target_pos', 'scores', 'ranks')))
+    
+    def top(self, k: int) -> 'MatchResult':
+        """The candidates ranked below k"""
+        if len(self.ranks) == 0 or self.ranks.max() < k:
+            return self
+        keep = self.ranks < k
+        return MatchResult(self.source_pos[keep], self.target_pos[keep], self.scores[keep], self.ranks[keep])
+
+def candidate_result(rows: np.ndarray, candidates: np.ndarray,
+                     top: np.ndarray, top_scores: np.ndarray) -> MatchResult:
+    """Flatten per-row candidate columns (-1 for none) into matches ordered by row and rank"""
+    row_index, ranks = np.nonzero(top >= 0)
+    return MatchResult(rows[row_index], candidates[top[row_index, ranks]],
+                       top_scores[row_index, ranks], ranks.astype(np.int32))
 
 @dataclass
-class TransformRule:
-    source_columns: List[str]
-    target_column: str
-    transform_type: str  # date_format, number_format, concatenate, etc.
-    parameters: Dict[str, Any]
+class EncodedSource:
+    """Source key columns in the representation of one target index.
+
+    Exact rules hold target codes (-1 when absent from the target), fuzzy rules
+    the normalized strings; columns keeps the normalized strings blocking looks up.
+    """
+    columns: List[Optional[pd.Series]]
+    values: List[np.ndarray]
+    filter_codes: Optional[np.ndarray]
+
+    def __len__(self):
+        return len(self.values[0]) if self.values else 0
+
+    def slice(self, start: int, stop: int, columns: Optional[List[int]] = None) -> 'EncodedSource':
+        """Rows start to stop, renumbered from 0; only the listed columns are kept when given"""
+        return EncodedSource(
+            [None if column is None or (columns is not None and i not in columns)
+             else column.iloc[start:stop].reset_index(drop=True)
+             for i, column in enumerate(self.columns)],
+            [values[start:stop] for values in self.values],
+            None if self.filter_codes is None else self.filter_codes[start:stop],
+        )
+
+class TargetIndex:
+    """Normalized target-side match state, built once and reused across source frames"""
+    
+    def __init__(self, target_df: pd.DataFrame, plan: MatchPlan,
+                 candidate_indexes: CandidateIndexCache,
+                 normalized: Optional[NormalizedColumns] = None):
+        self.frame = target_df
+        self.plan = plan
+        self.rules = plan.rules
+        self.normalized = normalized
+        self.columns = [
+            self._normalize(target_df, rule.target_column, normalization(rule))
+            for rule in self.rules
+        ]
+        factorized = []
+        for rule, column in zip(self.rules, self.columns):
+            if normalized is not None:
+                factorized.append(normalized.factorized(target_df, rule.target_column, normalization(rule)))
+            else:
+                codes, uniques = pd.factorize(column)
+                factorized.append((codes, pd.Index(uniques)))
+        
+        # Rows repeating an earlier row's keys score alike and lose every tie to it,
+        # so only the first row of each key combination is indexed; rows maps back
+        self.rows: Optional[np.ndarray] = None
+        # Distinct key of every target row, and those rows by key once top-k needs them
+        self.row_keys: Optional[np.ndarray] = None
+        self._rows_by_key = None
+        if self.rules:
+            group, first = distinct_rows([codes for codes, _ in factorized])
+            if len(first) < len(self.columns[0]):
+                self.rows = first
+                self.row_keys = group
+                self.columns = [column.take(first).reset_index(drop=True) for column in self.columns]
+                factorized = [(codes[first], uniques) for codes, uniques in factorized]
+        
+        # Exact rules compare integer codes, fuzzy rules compare the strings
+        self.values = []
+        self.uniques = []
+        for rule, column, (codes, uniques) in zip(self.rules, self.columns, factorized):
+            if rule.match_type == 'exact':
+                self.values.append(codes)
+                self.uniques.append(uniques)
+            else:
+                self.values.append(column.to_numpy(dtype=object))
+                self.uniques.append(None)
+        
+        # Target rows grouped by their composite key over the filter rules
+        self.filter_keys = None
+        if plan.filter_steps:
+            if len(plan.filter_steps) == 1 and self.uniques[plan.filter_steps[0].rule_index] is not None:
+                # One exact key is already factorized, and its uniques are cached with their hash table
+                rule_index = plan.filter_steps[0].rule_index
+                codes, self.filter_keys = self.values[rule_index], self.uniques[rule_index]
+            else:
+                keys = key_index([self.columns[step.rule_index] for step in plan.filter_steps])
+                codes, self.filter_keys = keys.factorize()
+            self.group_order = np.argsort(codes, kind='stable')
+            self.group_starts = np.searchsorted(codes[self.group_order], np.arange(len(self.filter_keys) + 1))
+            self.filter_codes = codes
+        
+        self.blocking = [
+            (i, candidate_indexes.get(self.columns[i], self.rules[i].blocking, self.rules[i].blocking_params))
+            for i in plan.blocked_rules
+        ]
+    
+    def __len__(self):
+        return len(self.frame) if self.rows is None else len(self.rows)
+    
+    def _normalize(self, df: pd.DataFrame, column: str, options: Tuple) -> pd.Series:
+        if self.normalized is not None:
+            return self.normalized.column(df, column, options)
+        return normalize_column(df[column], *options)
+    
+    def encode_source(self, source_df: pd.DataFrame) -> EncodedSource:
+        """Normalize source columns into the same representation as the target values"""
+        columns = [
+            self._normalize(source_df, rule.source_column, normalization(rule))
+            for rule in self.rules
+        ]
+        values = []
+        for column, uniques in zip(columns, self.uniques):
+            if uniques is not None:
+                # Values missing from the target get -1, which never equals a target code
+                values.append(uniques.get_indexer(column))
+            else:
+                values.append(column.to_numpy(dtype=object))
+        
+        filter_codes = None
+        if self.filter_keys is not None:
+            keys = key_index([columns[step.rule_index] for step in self.plan.filter_steps])
+            filter_codes = self.filter_keys.get_indexer(keys)
+        return EncodedSource(columns, values, filter_codes)
+    
+    def group_rows(self, code: int) -> np.ndarray:
+        """Ascending target positions whose filter key has the given code"""
+        return self.group_order[self.group_starts[code]:self.group_starts[code + 1]]
+    
+    def expand_duplicates(self, result: MatchResult, k: int) -> MatchResult:
+        """Candidates over distinct target keys as target rows: up to k rows sharing each key,
+        re-ranked by score and then target position, keeping k per source row"""
+        if self._rows_by_key is None:
+            order = np.argsort(self.row_keys, kind='stable')
+            self._rows_by_key = (order, np.searchsorted(self.row_keys[order], np.arange(len(self.rows) + 1)))
+        order, starts = self._rows_by_key
+        sizes = np.minimum(starts[result.target_pos + 1] - starts[result.target_pos], k)
+        candidate = np.repeat(np.arange(len(result)), sizes)
+        offsets = np.arange(len(candidate)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        source_pos = result.source_pos[candidate]
+        target_pos = order[starts[result.target_pos[candidate]] + offsets]
+        scores = result.scores[candidate]
+        ranked = np.lexsort((target_pos, -scores, source_pos))
+        source_pos, target_pos, scores = source_pos[ranked], target_pos[ranked], scores[ranked]
+        ranks = np.arange(len(source_pos)) - np.searchsorted(source_pos, source_pos)
+        keep = ranks < k
+        return MatchResult(source_pos[keep], target_pos[keep], scores[keep], ranks[keep].astype(np.int32))
+
+def _extends(old: np.ndarray, new: np.ndarray) -> bool:
+    """True when new equals old or appends rows to it"""
+    return len(new) >= len(old) and np.array_equal(new[:len(old)], old)
+
+class IncrementalMatchState:
+    """What the previous run matched, kept so appended rows can be matched alone.
+    
+    The target side is held as indexed segments: the rows of the first run
+    plus one segment per appended batch. Each source row keeps its best
+    target and score; a later segment only replaces it with a strictly
+    higher score, which keeps the first-best-row-wins rule of a full run.
+    """
+    # Segments are merged back into one index beyond this count
+    MAX_SEGMENTS = 8
+    
+    def __init__(self, rules_key, source_df: pd.DataFrame, target_df: pd.DataFrame, index: TargetIndex):
+        self.rules_key = rules_key
+        self.source_columns = list(source_df.columns)
+        self.target_columns = list(target_df.columns)
+        self.source_hashes = row_hashes(source_df)
+        self.target_hashes = row_hashes(target_df)
+        self.segments: List[Tuple[int, TargetIndex]] = [(0, index)]
+        self.best_target = np.full(len(source_df), -1, dtype=np.int64)
+        self.best_score = np.zeros(len(source_df))
+    
+    def merge(self, result: MatchResult, source_offset: int = 0, target_offset: int = 0):
+        rows = result.source_pos + source_offset
+        better = result.scores > self.best_score[rows]
+        self.best_target[rows[better]] = result.target_pos[better] + target_offset
+        self.best_score[rows[better]] = result.scores[better]
+    
+    def result(self) -> MatchResult:
+        source_pos = np.flatnonzero(self.best_target >= 0)
+        return MatchResult(source_pos, self.best_target[source_pos], self.best_score[source_pos])
 
 class DataTransformer:
     def __init__(self):
         self.match_rules: List[MatchRule] = []
         self.transform_rules: List[TransformRule] = []
+        self.candidate_indexes = CandidateIndexCache()
+        # Normalized key columns of every loaded file, reused across rules, edges and runs
+        self.normalized_columns = NormalizedColumns()
+        self.last_plan: Optional[MatchPlan] = None
+        # Matched frames from earlier runs; a transform-only edit reuses them
+        self.match_cache: Optional[MatchCache] = MatchCache()
+        self.last_match_cached = False
+        # Re-imports that only append rows are matched by their delta
+        self.incremental = True
+        self.incremental_state: Optional[IncrementalMatchState] = None
+        self.last_match_incremental = False
+        # (source rows, target rows) matched by the last incremental run
+        self.last_incremental_rows = (0, 0)
+        # Upper bound on the score matrix held at once while matching
+        self.score_chunk_bytes = 64 * 1024 * 1024
+        # Threads rapidfuzz uses per score matrix; -1 uses every core
+        self.score_workers = -1
+        # Worker processes that share scoring; 1 matches in-process, None uses every core
+        self.match_workers: Optional[int] = 1
+        # Smaller jobs finish before worker processes would have started
+        self.parallel_min_pairs = 50_000_000
+        self._parallel = None
+        # Transform outputs of the last run, reused while their inputs are unchanged
+        self.transform_pipeline = TransformPipeline()
+        # Transform rules that failed in the last apply, with their errors
+        self.last_transform_errors: List[Tuple[TransformRule, str]] = []
+        # Stages of the current operation are recorded here when set
+        self.run_log: Optional[RunLog] = None
+        # Pairs scored over the transformer's lifetime, across every match call
+        self.pairs_scored_total = 0
+        # Row position in each joined file of every row of the last match_files result
+        self.last_positions: Dict[str, np.ndarray] = {}
+        # What pairwise matches output, one of MATCH_MODES, and the candidates 'top_k' keeps
+        self.match_mode = 'best'
+        self.top_k = 3
+        # (inputs and rules key, k, candidates) of the last pairwise scoring pass,
+        # which every mode needing no more candidates reuses
+        self._last_candidates = None
+        # Called with (rows done, rows total); may raise OperationCancelled
+        self.progress_callback: Optional[Callable[[int, int], None]] = None
         
     def add_match_rule(self, rule: MatchRule):
         self.match_rules.append(rule)
         
     def add_transform_rule(self, rule: TransformRule):
         self.transform_rules.append(rule)
+    
+    @property
+    def pairs_scored(self) -> int:
+        return self.last_plan.pairs_scored if self.last_plan is not None else 0
         
+    def compile_plan(self, rules: Optional[List[MatchRule]] = None) -> MatchPlan:
+        return MatchPlan(self.match_rules if rules is None else rules)
+    
+    def match_files(self, frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Join every file the match rules reach, starting from the first file.
+        
+        A single pair of files goes through match_records with its caching and
+        incremental matching; larger join graphs match one edge at a time.
+        """
+        try:
+            return self._join_files(frames)
+        finally:
+            # Idle workers would each keep a copy of the target mapped
+            self.shutdown_workers()
+    
+    def _join_files(self, frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        names = list(frames)
+        graph = JoinGraph(self.match_rules, names)
+        if graph.is_pairwise:
+            edge = graph.edges[0] if graph.edges else None
+            source, target = (edge.source_file, edge.target_file) if edge else (names[0], names[1])
+            matched, (source_pos, target_pos) = self._match_pair(frames[source], frames[target])
+            self.last_positions = {source: source_pos, target: target_pos}
+            if source_pos is None:
+                del self.last_positions[source]
+            return matched
+        if self.match_mode != 'best':
+            raise ValueError(f"Match mode '{self.match_mode}' needs match rules between two files")
+        
+        self.last_match_cached = False
+        self.last_match_incremental = False
+        # Row position of every joined file, per result row
+        positions = {graph.root: np.arange(len(frames[graph.root]))}
+        progress_callback = self.progress_callback
+        try:
+            for number, edge in enumerate(graph.edges):
+                source_df = frames[edge.source_file]
+                if progress_callback is not None:
+                    # Each edge takes an equal share of the progress bar
+                    def report(done, total, number=number):
+                        share = done * 1000 // total if total else 0
+                        progress_callback(number * 1000 + share, len(graph.edges) * 1000)
+                    self.progress_callback = report
+                with record_stage(self.run_log, f"match {edge.source_file} -> {edge.target_file}",
+                                  len(source_df)) as stats:
+                    pairs_before = self.pairs_scored_total
+                    index = self.build_target_index(frames[edge.target_file], edge.rules)
+                    result = self.match_positions(source_df, index)
+                    stats.pairs_scored = self.pairs_scored_total - pairs_before
+                
+                best = np.full(len(source_df), -1, dtype=np.int64)
+                best[result.source_pos] = result.target_pos
+                matched = best[positions[edge.source_file]]
+                keep = matched >= 0
+                positions = {name: rows[keep] for name, rows in positions.items()}
+                positions[edge.target_file] = matched[keep]
+        finally:
+            self.progress_callback = progress_callback
+        self.last_positions = {name: positions[name] for name in graph.files}
+        return build_joined_frame([(frames[name], positions[name]) for name in graph.files])
+        
+    def required_columns(self, file_columns: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Columns of each file that the match and transform rules read, in file order"""
+        graph = JoinGraph(self.match_rules, list(file_columns))
+        needed = {name: set() for name in file_columns}
+        for edge in graph.edges:
+            for rule in edge.rules:
+                needed[edge.source_file].add(rule.source_column)
+                needed[edge.target_file].add(rule.target_column)
+        # Transforms read the joined frame, so any file may supply their inputs
+        transform_inputs = {column for rule in self.transform_rules for column in rule.source_columns}
+        return {
+            name: [column for column in columns if column in needed[name] or column in transform_inputs]
+            for name, columns in file_columns.items()
+        }
+    
+    def match_lean(self, files: Dict[str, LeanFile]) -> pd.DataFrame:
+        """Match and transform files loaded with only the columns the rules read.
+        
+        Columns the rules newly refer to are loaded first. Once the matched rows
+        are known, the other columns are read for those rows only, giving the
+        same frame as matching and transforming the fully loaded files.
+        """
+        needed = self.required_columns({name: lean.columns for name, lean in files.items()})
+        with record_stage(self.run_log, 'load rule columns') as stats:
+            loaded = [lean for name, lean in files.items() if lean.ensure_columns(needed[name])]
+            stats.rows = sum(len(lean.frame) for lean in loaded)
+        
+        transformed = self.apply_transformations(self.match_files({name: lean.frame for name, lean in files.items()}))
+        with record_stage(self.run_log, 'fetch output columns', len(transformed)):
+            parts = []
+            for name, positions in self.last_positions.items():
+                # Left and outer joins have rows without a row of this file
+                present = positions >= 0
+                local = np.full(len(positions), -1, dtype=np.int64)
+                local[present] = np.arange(int(present.sum()))
+                parts.append((files[name].take(positions[present]), local))
+            result = build_joined_frame(parts)
+            if self.match_mode == 'top_k':
+                for column in (MATCH_RANK_COLUMN, MATCH_SCORE_COLUMN):
+                    result[column] = transformed[column]
+            # Transform outputs in the order the pipeline wrote them
+            for rule in self.transform_rules:
+                if rule.target_column in transformed.columns:
+                    result[rule.target_column] = transformed[rule.target_column]
+        return result
+    
     def match_records(self, source_df: pd.DataFrame, target_df: pd.DataFrame) -> pd.DataFrame:
-        matched_records = []
+        try:
+            return self._match_pair(source_df, target_df)[0]
+        finally:
+            self.shutdown_workers()
+    
+    def _match_pair(self, source_df: pd.DataFrame,
+                    target_df: pd.DataFrame) -> Tuple[pd.DataFrame, Tuple[Optional[np.ndarray], np.ndarray]]:
+        """Frame of match_mode with the source and target row position of each of its rows.
         
-        for _, source_row in source_df.iterrows():
-            best_match = None
-            best_score = 0
+        Position -1 marks a row without a row of that file; anti-joins have no
+        source positions at all.
+        """
+        k = self._candidates_per_row()
+        with record_stage(self.run_log, 'match', len(source_df)) as stats:
+            pair_key = cache_key = None
+            if self.match_cache is not None:
+                pair_key = self.match_cache.key(source_df, target_df, self.match_rules)
+                cache_key = pair_key + (self.match_mode, k)
+                cached = self.match_cache.get(cache_key)
+                self.last_match_cached = stats.cached = cached is not None
+                if cached is not None:
+                    return cached
             
-            for _, target_row in target_df.iterrows():
-                match_scores = []
-                
-                for rule in self.match_rules:
-                    source_val = str(source_row[rule.source_column])
-                    target_val = str(target_row[rule.target_column])
-                    
-                    if not rule.case_sensitive:
-                        source_val = source_val.lower()
-                        target_val = target_val.lower()
-                    
-                    if rule.match_type == 'exact':
-                        score = 1.0 if source_val == target_val else 0.0
-                    else:  # fuzzy
-                        score = fuzz.ratio(source_val, target_val) / 100
-                        
-                    match_scores.append(score)
-                
-                avg_score = sum(match_scores) / len(match_scores)
-                if avg_score > best_score and avg_score >= min(rule.threshold for rule in self.match_rules):
-                    best_score = avg_score
-                    best_match = target_row
+            pairs_before = self.pairs_scored_total
+            self.last_match_incremental = False
+            last = self._last_candidates
+            if pair_key is not None and last is not None and last[0] == pair_key and last[1] >= k:
+                # Only the mode changed; the last scoring pass already holds these candidates
+                result = last[2].top(k)
+                self.last_match_cached = stats.cached = True
+            else:
+                if k == 1 and self.incremental:
+                    result = self._match_incremental(source_df, target_df)
+                else:
+                    result = self.match_positions(source_df, self.build_target_index(target_df), k)
+                if pair_key is not None:
+                    self._last_candidates = (pair_key, k, result)
+            matched, positions = self.build_mode_frame(source_df, target_df, result)
+            stats.pairs_scored = self.pairs_scored_total - pairs_before
+            if cache_key is not None:
+                self.match_cache.put(cache_key, matched, positions)
+            return matched, positions
+    
+    def _match_incremental(self, source_df: pd.DataFrame, target_df: pd.DataFrame) -> MatchResult:
+        """Match only the rows appended since the previous run when that is possible"""
+        state = self.incremental_state
+        key = rules_key(self.match_rules)
+        source_hashes = row_hashes(source_df)
+        target_hashes = row_hashes(target_df)
+        if (state is None or state.rules_key != key
+                or state.source_columns != list(source_df.columns)
+                or state.target_columns != list(target_df.columns)
+                or not _extends(state.source_hashes, source_hashes)
+                or not _extends(state.target_hashes, target_hashes)):
+            index = self.build_target_index(target_df)
+            state = IncrementalMatchState(key, source_df, target_df, index)
+            state.merge(self.match_positions(source_df, index))
+            self.incremental_state = state
+            self.last_match_incremental = False
+            self.last_incremental_rows = (len(source_df), len(target_df))
+            return state.result()
+        
+        # A failed or cancelled delta run leaves partial merges behind; start over next time
+        self.incremental_state = None
+        old_sources = len(state.source_hashes)
+        old_targets = len(state.target_hashes)
+        if len(target_hashes) > old_targets:
+            delta_index = self.build_target_index(target_df.iloc[old_targets:].reset_index(drop=True))
+            # Historical source rows only need scoring against the new target rows
+            state.merge(self.match_positions(source_df.iloc[:old_sources], delta_index),
+                        target_offset=old_targets)
+            state.segments.append((old_targets, delta_index))
+            if len(state.segments) > state.MAX_SEGMENTS:
+                state.segments = [(0, self.build_target_index(target_df))]
+        
+        if len(source_hashes) > old_sources:
+            new_rows = source_df.iloc[old_sources:].reset_index(drop=True)
+            state.best_target = np.concatenate([state.best_target, np.full(len(new_rows), -1, dtype=np.int64)])
+            state.best_score = np.concatenate([state.best_score, np.zeros(len(new_rows))])
+            for offset, index in state.segments:
+                state.merge(self.match_positions(new_rows, index), old_sources, offset)
+        
+        self.incremental_state = state
+        self.last_match_incremental = True
+        self.last_incremental_rows = (len(source_hashes) - old_sources, len(target_hashes) - old_targets)
+        state.source_hashes = source_hashes
+        state.target_hashes = target_hashes
+        return state.result()
+    
+    def _candidates_per_row(self) -> int:
+        if self.match_mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode: {self.match_mode}")
+        return max(1, self.top_k) if self.match_mode == 'top_k' else 1
+    
+    def build_mode_frame(self, source_df: pd.DataFrame, target_df: pd.DataFrame,
+                         result: MatchResult) -> Tuple[pd.DataFrame, Tuple[Optional[np.ndarray], np.ndarray]]:
+        """Output frame of match_mode built from one scoring pass, with its row positions"""
+        if self.match_mode == 'top_k':
+            matched = build_matched_frame(source_df, target_df, result.source_pos, result.target_pos)
+            matched[MATCH_RANK_COLUMN] = result.ranks + 1
+            matched[MATCH_SCORE_COLUMN] = result.scores
+            return matched, (result.source_pos, result.target_pos)
+        
+        best = result.top(1)
+        if self.match_mode == 'anti':
+            target_pos = self.unmatched_target_rows(target_df, best.target_pos)
+            return target_df.take(target_pos).reset_index(drop=True), (None, target_pos)
+        source_pos, target_pos = best.source_pos, best.target_pos
+        if self.match_mode in ('left', 'outer'):
+            source_pos = np.arange(len(source_df))
+            target_pos = np.full(len(source_df), -1, dtype=np.int64)
+            target_pos[best.source_pos] = best.target_pos
+        if self.match_mode == 'outer':
+            unmatched = self.unmatched_target_rows(target_df, best.target_pos)
+            source_pos = np.concatenate([source_pos, np.full(len(unmatched), -1, dtype=np.int64)])
+            target_pos = np.concatenate([target_pos, unmatched])
+        return build_matched_frame(source_df, target_df, source_pos, target_pos), (source_pos, target_pos)
+    
+    def unmatched_target_rows(self, target_df: pd.DataFrame, matched_rows: np.ndarray) -> np.ndarray:
+        """Ascending target rows whose match keys no matched row shares.
+        
+        Rows repeating a matched row's keys lose every tie to it, yet have a
+        counterpart in the source, so they do not count as unmatched.
+        """
+        codes = [
+            self.normalized_columns.factorized(target_df, rule.target_column, normalization(rule))[0]
+            for rule in self.match_rules
+        ]
+        keys = distinct_rows(codes)[0] if codes else np.arange(len(target_df))
+        matched = np.zeros(int(keys.max(initial=-1)) + 1, dtype=bool)
+        matched[keys[matched_rows]] = True
+        return np.flatnonzero(~matched[keys])
+    
+    def build_target_index(self, target_df: pd.DataFrame,
+                           rules: Optional[List[MatchRule]] = None) -> TargetIndex:
+        return TargetIndex(target_df, self.compile_plan(rules), self.candidate_indexes,
+                           normalized=self.normalized_columns)
+    
+    def match_positions(self, source_df: pd.DataFrame, index: TargetIndex, k: int = 1) -> MatchResult:
+        """Matched source and target row positions for a source frame, up to k per source row"""
+        plan = index.plan
+        plan.reset_stats()
+        plan.source_rows = len(source_df)
+        plan.target_rows = len(index.frame)
+        if index.rows is not None:
+            plan.distinct_target_rows = len(index.rows)
+        self.last_plan = plan
+        start = time.perf_counter()
+        
+        if plan.strategy == 'none':
+            result = MatchResult.empty()
+        elif plan.strategy == 'hash_join':
+            result = self._hash_join(source_df, index)
+        else:
+            result = self._match_distinct(source_df, index, k)
+        self._report_progress(len(source_df), len(source_df))
+        if index.rows is not None and k > 1:
+            # Runners-up may be rows repeating the keys of a better candidate
+            result = index.expand_duplicates(result, k)
+        elif index.rows is not None:
+            # Back from distinct target keys to target rows
+            result = MatchResult(result.source_pos, index.rows[result.target_pos], result.scores)
+        
+        plan.seconds = time.perf_counter() - start
+        self.pairs_scored_total += plan.pairs_scored
+        return result
+    
+    def _match_distinct(self, source_df: pd.DataFrame, index: TargetIndex, k: int = 1) -> MatchResult:
+        """Score each distinct combination of source keys once and expand the matches to every row"""
+        codes = [
+            self.normalized_columns.factorized(source_df, rule.source_column, normalization(rule))[0]
+            for rule in index.rules
+        ]
+        group, first = distinct_rows(codes)
+        if len(first) > DEDUP_MAX_RATIO * len(source_df):
+            return self._score_rows(source_df, index, k)
+        
+        index.plan.distinct_source_rows = len(first)
+        columns = list(dict.fromkeys(rule.source_column for rule in index.rules))
+        result = self._score_rows(source_df[columns].take(first).reset_index(drop=True), index, k)
+        # Every row takes the candidates of its distinct keys, which are stored contiguously
+        counts = np.bincount(result.source_pos, minlength=len(first))
+        starts = np.cumsum(counts) - counts
+        row_counts = counts[group]
+        rows = np.repeat(np.arange(len(group)), row_counts)
+        offsets = np.arange(len(rows)) - np.repeat(np.cumsum(row_counts) - row_counts, row_counts)
+        picks = np.repeat(starts[group], row_counts) + offsets
+        return MatchResult(rows, result.target_pos[picks], result.scores[picks], result.ranks[picks])
+    
+    def _score_rows(self, source_df: pd.DataFrame, index: TargetIndex, k: int = 1) -> MatchResult:
+        encoded = index.encode_source(source_df)
+        if self.match_workers != 1 and self._estimated_pairs(encoded, index) >= self.parallel_min_pairs:
+            return self._parallel_match(encoded, index, k)
+        return self.score_encoded(encoded, index, k)
+    
+    def score_encoded(self, encoded: EncodedSource, index, k: int = 1) -> MatchResult:
+        """Score encoded source rows against index, a TargetIndex or a worker's shared copy of one"""
+        if index.plan.strategy == 'blocked':
+            return self._blocked_match(encoded, index, k)
+        if index.plan.strategy == 'grouped':
+            return self._grouped_match(encoded, index, k)
+        return self._dense_match(encoded, index, k)
+    
+    def _estimated_pairs(self, encoded: EncodedSource, index: TargetIndex) -> int:
+        """Pairs scoring will consider before pruning; blocked plans count every target row"""
+        if index.plan.strategy == 'grouped':
+            codes = encoded.filter_codes[encoded.filter_codes >= 0]
+            return int(np.diff(index.group_starts)[codes].sum())
+        return len(encoded) * len(index)
+    
+    def _parallel_match(self, encoded: EncodedSource, index: TargetIndex, k: int = 1) -> MatchResult:
+        """Shard encoded source rows across worker processes that map one copy of the target arrays"""
+        from .parallel_match import ParallelMatcher
+        # Equal target content and rules build equal arrays, whichever index object holds them
+        key = (frame_fingerprint(index.frame), rules_key(index.rules))
+        if self._parallel is None or self._parallel.key != key:
+            self.shutdown_workers()
+            workers = self.match_workers or os.cpu_count() or 1
+            self._parallel = ParallelMatcher(index, key, workers, self.score_chunk_bytes)
+        try:
+            return self._parallel.match(encoded, index.plan, self.progress_callback, k)
+        except BaseException:
+            # Shards still running after a failure or cancel belong to a stale pool
+            self.shutdown_workers()
+            raise
+    
+    def shutdown_workers(self):
+        """Stop the worker processes of the current run; every public match call ends with this"""
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+    
+    def _report_progress(self, done: int, total: int):
+        if self.progress_callback is not None:
+            self.progress_callback(done, total)
+    
+    def stream_match(self, source_chunks: Iterable[pd.DataFrame], target_df: pd.DataFrame,
+                     write_chunk: Callable[[pd.DataFrame], None]) -> int:
+        """Match and transform source chunks one at a time against an in-memory target.
+        
+        Each transformed chunk is handed to write_chunk and dropped, so memory
+        stays bounded by the target index plus one chunk. Returns rows written.
+        """
+        if self.match_mode in ('outer', 'anti'):
+            raise ValueError(f"Match mode '{self.match_mode}' needs the whole source and cannot be streamed")
+        k = self._candidates_per_row()
+        index = self.build_target_index(target_df)
+        rows_written = 0
+        rows_read = 0
+        pairs_before = self.pairs_scored_total
+        # Per-chunk progress from the matcher would restart at zero for every chunk,
+        # and per-chunk transform stages would flood the run log
+        progress_callback, self.progress_callback = self.progress_callback, None
+        run_log, self.run_log = self.run_log, None
+        try:
+            with record_stage(run_log, 'stream match') as stats:
+                for chunk in source_chunks:
+                    chunk = chunk.reset_index(drop=True)
+                    result = self.match_positions(chunk, index, k)
+                    matched, _ = self.build_mode_frame(chunk, target_df, result)
+                    write_chunk(self.apply_transformations(matched))
+                    rows_written += len(matched)
+                    rows_read += len(chunk)
+                    stats.rows = rows_read
+                    stats.pairs_scored = self.pairs_scored_total - pairs_before
+                    if progress_callback is not None:
+                        # The total is unknown while streaming
+                        progress_callback(rows_read, 0)
+        finally:
+            self.progress_callback = progress_callback
+            self.run_log = run_log
+            self.shutdown_workers()
+        return rows_written
+    
+    def _hash_join(self, source_df: pd.DataFrame, index: TargetIndex):
+        filter_codes = index.encode_source(source_df).filter_codes
+        source_pos = np.flatnonzero(filter_codes >= 0)
+        # The first target row wins for duplicate keys, as in the pairwise loop
+        first_rows = index.group_order[index.group_starts[:-1]]
+        return MatchResult(source_pos, first_rows[filter_codes[source_pos]], np.ones(len(source_pos)))
+    
+    def _blocked_match(self, encoded: EncodedSource, index: TargetIndex, k: int = 1):
+        """Score each source row against the union of its blocking candidates"""
+        source_values, filter_codes = encoded.values, encoded.filter_codes
+        parts = []
+        for row in range(len(encoded)):
+            if row % 1000 == 0:
+                self._report_progress(row, len(encoded))
+            if filter_codes is not None and filter_codes[row] < 0:
+                continue
+            candidates = np.unique(np.concatenate([
+                candidate_index.candidates(encoded.columns[i].iat[row])
+                for i, candidate_index in index.blocking
+            ])).astype(np.int64)
+            if filter_codes is not None:
+                candidates = candidates[index.filter_codes[candidates] == filter_codes[row]]
+            if len(candidates) == 0:
+                continue
+            rows = np.array([row])
+            top, top_scores = self._top_candidates(index, source_values, index.values, rows, candidates, k)
+            if top[0, 0] >= 0:
+                parts.append(candidate_result(rows, candidates, top, top_scores))
+        return MatchResult.concat(parts)
+    
+    def _grouped_match(self, encoded: EncodedSource, index: TargetIndex, k: int = 1):
+        """Score source rows only against target rows sharing their exact filter key"""
+        source_values, filter_codes = encoded.values, encoded.filter_codes
+        rows_by_code = pd.Series(np.arange(len(encoded))).groupby(filter_codes).indices
+        parts = []
+        rows_done = 0
+        for code, rows in rows_by_code.items():
+            rows_done += len(rows)
+            if code < 0:
+                continue
+            candidates = index.group_rows(code)
+            chunk_rows = max(1, self.score_chunk_bytes // max(8 * len(candidates), 1))
+            for start in range(0, len(rows), chunk_rows):
+                block = rows[start:start + chunk_rows]
+                top, top_scores = self._top_candidates(index, source_values, index.values, block, candidates, k)
+                parts.append(candidate_result(block, candidates, top, top_scores))
+            self._report_progress(rows_done, len(encoded))
+        
+        result = MatchResult.concat(parts)
+        # Stable, so each row's candidates stay in rank order
+        order = np.argsort(result.source_pos, kind='stable')
+        return MatchResult(result.source_pos[order], result.target_pos[order],
+                           result.scores[order], result.ranks[order])
+    
+    def _dense_match(self, encoded: EncodedSource, index: TargetIndex, k: int = 1):
+        """Score blocks of source rows against every target row"""
+        all_targets = np.arange(len(index))
+        chunk_rows = max(1, self.score_chunk_bytes // max(8 * len(index), 1))
+        parts = []
+        for start in range(0, len(encoded), chunk_rows):
+            rows = np.arange(start, min(start + chunk_rows, len(encoded)))
+            top, top_scores = self._top_candidates(index, encoded.values, index.values, rows, all_targets, k)
+            parts.append(candidate_result(rows, all_targets, top, top_scores))
+            self._report_progress(rows[-1] + 1, len(encoded))
+        return MatchResult.concat(parts)
+    
+    def _score_block(self, plan: MatchPlan, source_values, target_values,
+                     rows: np.ndarray, candidates: np.ndarray, k: int = 1) -> np.ndarray:
+        """Summed rule scores for every (row, candidate) pair, following the plan.
+        
+        Candidates that can no longer reach the threshold or beat the k-th best
+        score already secured for every row are dropped before the next rule,
+        so their sums stay partial; they can never be selected.
+        """
+        n = len(plan.rules)
+        # Filter rules are already satisfied by every candidate
+        total = np.full((len(rows), len(candidates)), float(len(plan.filter_steps)))
+        alive = np.arange(len(candidates))
+        plan.pairs_considered += total.size
+        remaining = len(plan.score_steps)
+        for step in plan.score_steps:
+            remaining -= 1
+            source_vals = source_values[step.rule_index][rows]
+            target_vals = target_values[step.rule_index][candidates[alive]]
+            if step.kind == 'exact':
+                scores = source_vals[:, None] == target_vals[None, :]
+            else:  # fuzzy
+                scores = process.cdist(
+                    source_vals, target_vals,
+                    scorer=fuzz.ratio, score_cutoff=plan.score_cutoff,
+                    dtype=np.float64, workers=self.score_workers,
+                ) / 100
+            step.pairs_scored += scores.size
+            total[:, alive] += scores
             
-            if best_match is not None:
-                matched_record = {**source_row.to_dict(), **best_match.to_dict()}
-                matched_records.append(matched_record)
-                
-        return pd.DataFrame(matched_records)
+            if remaining and len(alive):
+                partial = total[:, alive]
+                # Each row must beat the threshold and its k-th best secured sum so far
+                if k == 1:
+                    secured = partial.max(axis=1)
+                elif partial.shape[1] >= k:
+                    secured = np.partition(partial, -k, axis=1)[:, -k]
+                else:
+                    secured = np.zeros(len(rows))
+                bar = np.maximum(secured, n * plan.min_threshold) - 1e-9
+                keep = (partial + remaining >= bar[:, None]).any(axis=0)
+                plan.pairs_pruned += int((~keep).sum()) * len(rows)
+                alive = alive[keep]
+        return total
+    
+    def _top_candidates(self, index: TargetIndex, source_values, target_values,
+                        rows: np.ndarray, candidates: np.ndarray, k: int = 1):
+        """Columns of the k best qualifying candidates per row, best first (or -1), and their scores"""
+        top = np.full((len(rows), k), -1, dtype=np.int64)
+        top_scores = np.zeros((len(rows), k))
+        if len(candidates) == 0:
+            return top, top_scores
+        plan = index.plan
+        scores = self._score_block(plan, source_values, target_values, rows, candidates, k)
+        scores /= len(plan.rules)
+        qualifying = np.where(scores >= plan.min_threshold, scores, 0.0)
+        all_rows = np.arange(len(rows))
+        for rank in range(min(k, len(candidates))):
+            # argmax takes the first of equal scores, so earlier target rows win ties
+            best = qualifying.argmax(axis=1)
+            best_scores = qualifying[all_rows, best]
+            found = best_scores > 0
+            if not found.any():
+                break
+            top[found, rank] = best[found]
+            top_scores[found, rank] = best_scores[found]
+            if rank + 1 < k:
+                qualifying[all_rows, best] = 0.0
+        return top, top_scores
+    
+    def blocking_recall(self, source_df: pd.DataFrame, target_df: pd.DataFrame) -> Dict[str, float]:
+        """Compare blocked matching against the brute-force baseline"""
+        rules = self.match_rules
+        try:
+            blocked = self.match_positions(source_df, self.build_target_index(target_df))
+            blocked_pairs = self.pairs_scored
+            self.match_rules = [replace(rule, blocking=None) for rule in rules]
+            full = self.match_positions(source_df, self.build_target_index(target_df))
+        finally:
+            self.match_rules = rules
+            self.shutdown_workers()
+        
+        baseline = set(zip(full.source_pos.tolist(), full.target_pos.tolist()))
+        found = set(zip(blocked.source_pos.tolist(), blocked.target_pos.tolist()))
+        return {
+            'baseline_matches': len(baseline),
+            'blocked_matches': len(found),
+            'recall': len(baseline & found) / len(baseline) if baseline else 1.0,
+            'pairs_scored': blocked_pairs,
+            'pairs_total': len(source_df) * len(target_df),
+        }
     
     def apply_transformations(self, df: pd.DataFrame) -> pd.DataFrame:
-        result_df = df.copy()
-        
-        for rule in self.transform_rules:
-            try:
-                if rule.transform_type == 'date_format':
-                    result_df[rule.target_column] = pd.to_datetime(
-                        df[rule.source_columns[0]], 
-                        format=rule.parameters.get('source_format'),
-                    ).dt.strftime(rule.parameters.get('target_format'))
-                    
-                elif rule.transform_type == 'number_format':
-                    result_df[rule.target_column] = pd.to_numeric(
-                        df[rule.source_columns[0]], 
-                        errors='coerce'
-                    ).round(rule.parameters.get('decimals', 2))
-                    
-                elif rule.transform_type == 'concatenate':
-                    result_df[rule.target_column] = df[rule.source_columns].astype(str).agg(
-                        rule.parameters.get('separator', ' ').join, axis=1
-                    )
-                    
-            except Exception as e:
-                print(f"Error applying transformation {rule.transform_type}: {str(e)}")
-                
-        return result_df
+        self.last_transform_errors = []
+        
+        def report_error(rule: TransformRule, e: Exception):
+            logger.warning("Error applying transformation %s to %s: %s",
+                           rule.transform_type, rule.target_column, e)
+            self.last_transform_errors.append((rule, str(e)))
+        
+        return self.transform_pipeline.apply(df, self.transform_rules, report_error, self.run_log)
@@ -0,0 +1,152 @@
+"""Parsed copies of imported files, so re-importing an unchanged file skips parsing.
+
+Each entry is a Feather (Arrow IPC) file named after the source file's path,
+size, modification time and content hash. Reading an entry touches it, and
+the least recently used entries are evicted once the cache outgrows its size
+limit.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+from .file_io import read_data_file
+
+CACHE_DIR = Path.home() / '.data_transform_match' / 'file_cache'
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+ENTRY_SUFFIX = '.feather'
+# Schema metadata key holding the categories dtypes
+CATEGORY_DTYPES_KEY = b'category_dtypes'
+# Bytes read at a time while hashing file contents
+HASH_BLOCK_BYTES = 1024 * 1024
+
+def content_hash(file_path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _category_dtypes(df: pd.DataFrame) -> Dict[str, List[str]]:
+    """Dtype of each categorical column's categories, which Arrow does not keep"""
+    dtypes = {}
+    for column, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = dtype.categories.dtype
+            # ArrowDtype and StringDtype share names like 'string[pyarrow]'
+            if isinstance(categories, pd.ArrowDtype):
+                dtypes[str(column)] = ['arrow', str(categories.pyarrow_dtype)]
+            else:
+                dtypes[str(column)] = ['pandas', str(categories)]
+    return dtypes
+
+def _restore_dtypes(df: pd.DataFrame, category_dtypes: Dict[str, List[str]]) -> pd.DataFrame:
+    """Give categoricals back the categories dtype they had before the round trip"""
+    for column, (kind, name) in category_dtypes.items():
+        dtype = df[column].dtype
+        target = pd.ArrowDtype(pa.type_for_alias(name)) if kind == 'arrow' else pd.api.types.pandas_dtype(name)
+        categories = dtype.categories.astype(target)
+        df[column] = df[column].astype(pd.CategoricalDtype(categories, dtype.ordered))
+    return df
+
+class ParsedFileCache:
+    """Size-bounded LRU cache of parsed data files on local disk"""
+
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def key(self, file_path: str) -> str:
+        path = Path(file_path).resolve()
+        stat = path.stat()
+        identity = f"{path}|{stat.st_size}|{stat.st_mtime_ns}|{content_hash(str(path))}"
+        return hashlib.blake2b(identity.encode(), digest_size=16).hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}{ENTRY_SUFFIX}"
+
+    def load(self, file_path: str) -> Tuple[pd.DataFrame, bool]:
+        """The parsed file and whether it came from the cache; misses are parsed and stored"""
+        key = self.key(file_path)
+        df = self.get(key)
+        if df is not None:
+            return df, True
+        df = read_data_file(file_path)
+        try:
+            self.put(key, df)
+        except (OSError, ValueError, TypeError, pa.ArrowException):
+            pass  # frames Arrow cannot store, or a full disk, just go uncached
+        return df, False
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        path = self.entry_path(key)
+        try:
+            table = feather.read_table(path)
+            # Reads count as use, so eviction drops the least recently imported files
+            os.utime(path)
+        except (OSError, ValueError, pa.ArrowException):
+            return None
+        category_dtypes = json.loads((table.schema.metadata or {}).get(CATEGORY_DTYPES_KEY, b'{}'))
+        return _restore_dtypes(table.to_pandas(), category_dtypes)
+
+    def put(self, key: str, df: pd.DataFrame):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.entry_path(key)
+        # Written under a temporary name so a crash never leaves a truncated entry
+        partial = path.with_name(f"{path.name}.{threading.get_ident()}.partial")
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            metadata = {**(table.schema.metadata or {}),
+                        CATEGORY_DTYPES_KEY: json.dumps(_category_dtypes(df)).encode()}
+            feather.write_feather(table.replace_schema_metadata(metadata), partial)
+            os.replace(partial, path)
+        finally:
+            partial.unlink(missing_ok=True)
+        self.evict()
+
+    def _entries(self):
+        if not self.directory.is_dir():
+            return []
+        entries = []
+        for path in self.directory.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+
+    def clear(self) -> int:
+        """Delete every entry; returns the bytes freed"""
+        freed = 0
+        with self._lock:
+            for _, size, path in self._entries():
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                freed += size
+        return freed
@@ -0,0 +1,757 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+
+# Source rows read per chunk when streaming a file through the matcher
+DEFAULT_CHUNKSIZE = 100_000
+# Rows read for the preview shown while the full file loads
+PREVIEW_ROWS = 1_000
+# Feather v2 files are Arrow IPC files
+ARROW_SUFFIXES = ('.feather', '.arrow', '.ipc')
+DATA_FILE_FILTER = (
+    "Data Files (*.csv *.xlsx *.parquet *.feather *.arrow);;CSV Files (*.csv);;"
+    "Excel Files (*.xlsx);;Parquet Files (*.parquet);;Feather/Arrow Files (*.feather *.arrow)"
+)
+EXPORT_FILE_FILTER = (
+    "CSV Files (*.csv);;Excel Files (*.xlsx);;Parquet Files (*.parquet);;"
+    "Feather/Arrow Files (*.feather *.arrow)"
+)
+# Text columns with at most this share of distinct values are stored as categoricals
+CATEGORY_MAX_RATIO = 0.5
+# Columns decoded at once when fetching rows from Parquet and Arrow files
+TAKE_COLUMN_GROUP = 16
+# Missing-value markers pandas reads as NA beyond pyarrow's defaults
+PANDAS_NULL_VALUES = ['<NA>', 'None']
+# Longest wait between progress reports while files load, so cancelling is noticed promptly
+PROGRESS_POLL_SECONDS = 0.1
+
+def _excel_engine() -> Optional[str]:
+    """Fastest installed .xlsx reader; None lets pandas use openpyxl"""
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        return None
+
+def _is_arrow_text(arrow_type) -> bool:
+    import pyarrow as pa
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+def _is_text(series: pd.Series) -> bool:
+    dtype = series.dtype
+    if isinstance(dtype, pd.ArrowDtype):
+        return _is_arrow_text(dtype.pyarrow_dtype)
+    return dtype == object or isinstance(dtype, pd.StringDtype)
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Store text columns as categoricals when repetitive, else as string[pyarrow]"""
+    for column in df.columns:
+        series = df[column]
+        if not _is_text(series):
+            continue
+        if len(series) and series.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(series):
+            df[column] = series.astype('category')
+        else:
+            df[column] = series.astype('string[pyarrow]')
+    return df
+
+def read_data_file(file_path: str, compact: bool = True) -> pd.DataFrame:
+    """Read a CSV, Excel, Parquet or Feather file; compact keeps it in Arrow-backed dtypes"""
+    path = Path(file_path)
+    suffix = path.suffix.lower()
+    options = {'dtype_backend': 'pyarrow'} if compact else {}
+    if suffix == '.csv':
+        try:
+            # Multi-threaded parser; the GIL is released while it runs
+            df = pd.read_csv(file_path, engine='pyarrow', **options)
+        except ImportError:
+            return pd.read_csv(file_path)
+    elif suffix == '.parquet':
+        df = pd.read_parquet(file_path, **options)
+    elif suffix in ARROW_SUFFIXES:
+        df = pd.read_feather(file_path, **options)
+    else:
+        df = pd.read_excel(file_path, engine=_excel_engine(), **options)
+    return compact_frame(df) if compact else df
+
+def read_head(file_path: str, rows: int = PREVIEW_ROWS, compact: bool = True) -> pd.DataFrame:
+    """First rows of a data file, read without parsing the rest of it"""
+    if Path(file_path).suffix.lower() == '.csv':
+        options = {'dtype_backend': 'pyarrow'} if compact else {}
+        df = pd.read_csv(file_path, nrows=rows, **options)
+    else:
+        chunks = iter_data_file(file_path, rows)
+        try:
+            df = next(chunks, None)
+        finally:
+            chunks.close()
+        if df is None:
+            # No data rows, so the full read is as cheap and keeps the header
+            return read_data_file(file_path, compact)
+    return compact_frame(df) if compact else df
+
+def read_schema(file_path: str) -> List[str]:
+    """Column names of a data file, read without loading any rows"""
+    suffix = Path(file_path).suffix.lower()
+    if suffix == '.csv':
+        return list(pd.read_csv(file_path, nrows=0).columns)
+    if suffix == '.parquet':
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(file_path).names)
+    if suffix in ARROW_SUFFIXES:
+        import pyarrow as pa
+        with pa.memory_map(str(file_path)) as source:
+            return list(pa.ipc.open_file(source).schema.names)
+    return list(pd.read_excel(file_path, nrows=0, engine=_excel_engine()).columns)
+
+def _arrow_to_pandas(table, compact: bool) -> pd.DataFrame:
+    return table.to_pandas(types_mapper=pd.ArrowDtype) if compact else table.to_pandas()
+
+def read_columns(file_path: str, columns: List[str], compact: bool = True) -> pd.DataFrame:
+    """Read only the given columns of a data file; Arrow files are memory-mapped"""
+    df = _read_columns(file_path, columns, compact)
+    return compact_frame(df) if compact else df
+
+def _read_columns(file_path: str, columns: List[str], compact: bool) -> pd.DataFrame:
+    suffix = Path(file_path).suffix.lower()
+    options = {'dtype_backend': 'pyarrow'} if compact else {}
+    if suffix == '.csv':
+        try:
+            df = pd.read_csv(file_path, engine='pyarrow', usecols=columns, **options)
+        except ImportError:
+            df = pd.read_csv(file_path, usecols=columns)
+    elif suffix == '.parquet':
+        df = pd.read_parquet(file_path, columns=columns, **options)
+    elif suffix in ARROW_SUFFIXES:
+        from pyarrow import feather
+        # Unselected columns of an uncompressed file are never paged in
+        df = _arrow_to_pandas(feather.read_table(str(file_path), columns=columns, memory_map=True), compact)
+    else:
+        df = pd.read_excel(file_path, usecols=columns, engine=_excel_engine(), **options)
+    return df[columns]
+
+class _DistinctValues:
+    """Row count and distinct non-missing values of a file's columns, gathered a piece at a time.
+
+    They give taken rows the text dtypes a full load gives the whole columns,
+    since a subset of rows can be more or less repetitive, or have values
+    where the whole column has none.
+    """
+
+    def __init__(self, empty_as_null: bool = False):
+        self.rows = 0
+        self.values: Dict[str, np.ndarray] = {}
+        # CSV and Excel columns without any value load as null (NaN floats uncompacted), not text
+        self.empty_as_null = empty_as_null
+
+    def _add(self, column: str, values: np.ndarray):
+        if column in self.values:
+            values = np.concatenate([self.values[column], values])
+        self.values[column] = pd.unique(values)
+
+    def add_table(self, table):
+        """Record the text columns of an Arrow table"""
+        import pyarrow.compute as pc
+        for name, column in zip(table.column_names, table.columns):
+            if _is_arrow_text(column.type):
+                self._add(name, pc.unique(column).drop_null().to_numpy(zero_copy_only=False))
+
+    def add_frame(self, frame: pd.DataFrame):
+        """Record every column of an untyped frame"""
+        for name in frame.columns:
+            self._add(name, frame[name].dropna().unique())
+
+    def add_chunk(self, chunk):
+        """Record the next chunk, an Arrow table or untyped frame, of a file read in order"""
+        self.rows += len(chunk)
+        if isinstance(chunk, pd.DataFrame):
+            self.add_frame(chunk)
+        else:
+            self.add_table(chunk)
+
+    def full_load_dtypes(self, df: pd.DataFrame, compact: bool) -> pd.DataFrame:
+        """Text columns of df in the dtypes a full load gives them, compacted or not"""
+        for column in df.columns:
+            series = df[column]
+            if not _is_text(series):
+                continue
+            uniques = pd.Series(self.values.get(column, np.empty(0, dtype=object)), dtype=object)
+            if self.empty_as_null and self.rows and not len(uniques):
+                import pyarrow as pa
+                df[column] = (pd.Series(pd.arrays.ArrowExtensionArray(pa.nulls(len(series))), index=series.index)
+                              if compact else pd.Series(np.nan, index=series.index))
+            elif not compact:
+                continue
+            elif self.rows and len(uniques) <= CATEGORY_MAX_RATIO * self.rows:
+                # The categories of the whole column, ordered as astype gives them
+                df[column] = series.astype(uniques.astype(series.dtype).astype('category').dtype)
+            else:
+                df[column] = series.astype('string[pyarrow]')
+        return df
+
+def take_rows(file_path: str, columns: List[str], positions: np.ndarray, compact: bool = True,
+              chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """The given columns at the given row positions, in positions order.
+
+    Arrow files are memory-mapped and Parquet files read only the row groups
+    holding the positions, a few columns at a time so only those are ever
+    decoded at once. CSV and Excel files have no random access, so the
+    columns are parsed chunksize rows at a time and only the rows at the
+    positions are kept from each chunk.
+
+    Text columns get the dtypes a full load gives them, which takes the
+    distinct values of the whole columns: CSV and Excel files are read to
+    the end, and with compact Parquet text columns are scanned a row group
+    at a time.
+    """
+    suffix = Path(file_path).suffix.lower()
+    positions = np.asarray(positions, dtype=np.int64)
+    if not columns:
+        return pd.DataFrame(index=pd.RangeIndex(len(positions)))
+    columnar = suffix in ARROW_SUFFIXES or suffix == '.parquet'
+    # Stored Arrow types need no help uncompacted
+    distinct = _DistinctValues(empty_as_null=not columnar) if compact or not columnar else None
+    if columnar:
+        import pyarrow as pa
+        if suffix == '.parquet':
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(file_path, memory_map=True)
+            metadata = parquet_file.metadata
+            sizes = np.array([metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)],
+                             dtype=np.int64)
+            starts = np.cumsum(sizes) - sizes
+            group_of_row = np.searchsorted(starts, positions, side='right') - 1
+            groups = np.unique(group_of_row)
+            # Where each group read starts within the tables read, to find the rows in them
+            offsets = np.zeros(len(sizes), dtype=np.int64)
+            offsets[groups] = np.cumsum(sizes[groups]) - sizes[groups]
+            rows = pa.array(positions - starts[group_of_row] + offsets[group_of_row])
+            read = lambda names: parquet_file.read_row_groups(groups.tolist(), columns=names)
+            if distinct is not None:
+                distinct.rows = metadata.num_rows
+                schema = parquet_file.schema_arrow
+                text = [name for name in columns if _is_arrow_text(schema.field(name).type)]
+                for i in range(metadata.num_row_groups if text else 0):
+                    distinct.add_table(parquet_file.read_row_group(i, columns=text))
+        else:
+            from pyarrow import feather
+            rows = pa.array(positions)
+            read = lambda names: feather.read_table(str(file_path), columns=names, memory_map=True)
+        tables = []
+        for i in range(0, len(columns), TAKE_COLUMN_GROUP):
+            table = read(columns[i:i + TAKE_COLUMN_GROUP])
+            if distinct is not None and suffix != '.parquet':
+                # Memory-mapped, so this is the whole file
+                distinct.rows = table.num_rows
+                distinct.add_table(table)
+            tables.append(table.take(rows))
+        df = pd.concat([_arrow_to_pandas(table, compact) for table in tables], axis=1)
+    elif suffix == '.csv':
+        try:
+            record = None if distinct is None else distinct.add_chunk
+            table = _take_from_chunks(_csv_tables(file_path, chunksize, columns), positions, record)
+            df = None if table is None else _arrow_to_pandas(table, compact)
+        except ImportError:
+            with pd.read_csv(file_path, usecols=columns, chunksize=chunksize) as reader:
+                df = _take_from_chunks(reader, positions)
+            distinct = None
+    else:
+        record = None if distinct is None else distinct.add_chunk
+        df = _take_from_chunks(_excel_frames(file_path, chunksize, columns), positions, record)
+        if df is not None:
+            # Typed once over the kept rows, as a full read types the whole column
+            df = df.convert_dtypes(dtype_backend='pyarrow') if compact else df.infer_objects()
+    if df is None:
+        df = pd.DataFrame(columns=columns)
+    df = df[columns]
+    if distinct is not None:
+        return distinct.full_load_dtypes(df, compact)
+    return compact_frame(df) if compact else df
+
+def _take_from_chunks(chunks: Iterator, positions: np.ndarray,
+                      record: Optional[Callable[..., None]] = None):
+    """Rows at the given positions of consecutive Arrow table or frame chunks, in positions order.
+
+    Only the picked rows of each chunk are kept, and reading stops after the
+    last position unless record is given, which is then called with every
+    chunk. Returns None for a file without data rows.
+    """
+    order = np.argsort(positions, kind='stable')
+    wanted = positions[order]
+    pieces = []
+    start = 0
+    try:
+        for chunk in chunks:
+            if record is not None:
+                record(chunk)
+            low, high = np.searchsorted(wanted, [start, start + len(chunk)])
+            if high > low or not pieces:
+                # An empty first piece keeps the columns and types
+                pieces.append(chunk.take(wanted[low:high] - start))
+            start += len(chunk)
+            if high == len(wanted) and record is None:
+                break
+    finally:
+        chunks.close()
+    if len(wanted) and (wanted[0] < 0 or wanted[-1] >= start):
+        raise IndexError(f"Row positions must be between 0 and {start - 1}")
+    if not pieces:
+        # No data rows
+        return None
+    # Picked row j holds positions[order[j]]
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    if isinstance(pieces[0], pd.DataFrame):
+        return pd.concat(pieces, ignore_index=True).take(inverse).reset_index(drop=True)
+    import pyarrow as pa
+    return pa.concat_tables(pieces).take(inverse)
+
+class LeanFile:
+    """A data file loaded with only some of its columns.
+
+    Matching and transforms run on frame, which holds the columns they read;
+    the other columns are read for the rows of the final output only.
+    """
+
+    def __init__(self, file_path: str, columns: Optional[List[str]] = None):
+        self.path = Path(file_path)
+        # Every column of the file, in file order
+        self.columns = columns if columns is not None else read_schema(file_path)
+        self.frame: Optional[pd.DataFrame] = None
+
+    @property
+    def loaded_columns(self) -> List[str]:
+        return [] if self.frame is None else list(self.frame.columns)
+
+    def ensure_columns(self, columns: List[str]) -> bool:
+        """Load the given columns if they are not loaded yet; returns whether anything was read.
+
+        Loading replaces frame with a new object; frames are never changed in place.
+        """
+        wanted = set(self.loaded_columns) | {column for column in columns if column in self.columns}
+        if not wanted and self.columns:
+            # Row counts need at least one column
+            wanted = {self.columns[0]}
+        missing = [column for column in self.columns if column in wanted and column not in self.loaded_columns]
+        if not missing and self.frame is not None:
+            return False
+        added = read_columns(str(self.path), missing)
+        if self.frame is None:
+            self.frame = added
+        else:
+            frame = pd.concat([self.frame, added], axis=1)
+            self.frame = frame[[column for column in self.columns if column in frame.columns]]
+        return True
+
+    def take(self, positions: np.ndarray) -> pd.DataFrame:
+        """Every column at the given row positions, reading unloaded columns from the file"""
+        loaded = self.frame.take(positions).reset_index(drop=True)
+        missing = [column for column in self.columns if column not in loaded.columns]
+        if not missing:
+            return loaded
+        fetched = take_rows(str(self.path), missing, positions)
+        return pd.concat([loaded, fetched], axis=1)[self.columns]
+
+def frame_memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+@dataclass
+class LoadedFile:
+    path: Path
+    data: Optional[pd.DataFrame]
+    seconds: float
+    error: Optional[str] = None
+    memory_bytes: int = 0
+    disk_bytes: int = 0
+    # Set when only some columns were loaded
+    lean: Optional[LeanFile] = None
+    # Loaded from the parsed file cache instead of parsing the file
+    cached: bool = False
+
+    def summary(self) -> str:
+        lean = ""
+        if self.lean is not None:
+            lean = f", {len(self.lean.loaded_columns)} of {len(self.lean.columns)} columns"
+        if self.cached:
+            lean += ", cached"
+        return (f"{self.path.name} ({self.seconds:.2f}s, {format_bytes(self.memory_bytes)} in memory, "
+                f"{format_bytes(self.disk_bytes)} on disk{lean})")
+
+def _timed_read(file_path: str, head_rows: Optional[int] = None,
+                columns: Optional[List[str]] = None, cache=None) -> LoadedFile:
+    start = time.perf_counter()
+    lean = None
+    cached = False
+    try:
+        if head_rows:
+            df = read_head(file_path, head_rows)
+        elif columns is not None:
+            lean = LeanFile(file_path)
+            lean.ensure_columns(columns)
+            df = lean.frame
+        elif cache is not None:
+            df, cached = cache.load(file_path)
+        else:
+            df = read_data_file(file_path)
+    except Exception as e:
+        return LoadedFile(Path(file_path), None, time.perf_counter() - start, str(e))
+    seconds = time.perf_counter() - start
+    return LoadedFile(Path(file_path), df, seconds, memory_bytes=frame_memory_bytes(df),
+                      disk_bytes=Path(file_path).stat().st_size, lean=lean, cached=cached)
+
+def read_files_parallel(file_paths: List[str], max_workers: Optional[int] = None,
+                        progress_callback: Optional[Callable[[int, int], None]] = None,
+                        head_rows: Optional[int] = None,
+                        columns: Optional[Dict[str, List[str]]] = None,
+                        cache=None) -> List[LoadedFile]:
+    """Load several files concurrently; results keep the order of file_paths.
+    
+    With head_rows only the first rows of each file are read. With columns,
+    keyed by file name, each file is loaded lean with just those columns.
+    Full loads go through cache, a ParsedFileCache, when one is given.
+    progress_callback is also called while no read finishes; when it raises,
+    as a cancelling callback does, the loads are abandoned at once.
+    """
+    results: List[Optional[LoadedFile]] = [None] * len(file_paths)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            pool.submit(_timed_read, path, head_rows,
+                        None if columns is None else columns.get(Path(path).name, []), cache): i
+            for i, path in enumerate(file_paths)
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=PROGRESS_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+            if progress_callback is not None:
+                progress_callback(len(file_paths) - len(pending), len(file_paths))
+    except BaseException:
+        # Reads already running finish in the background and are discarded; queued ones never start
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return results
+
+def _csv_tables(file_path: str, chunksize: int, columns: Optional[List[str]] = None) -> Iterator['pa.Table']:
+    """CSV chunks as Arrow tables in the types read_data_file gives the whole file.
+
+    Column types are inferred from the first block and then fixed, so a key
+    column keeps one type in every chunk; columns empty throughout that block
+    are read as text instead of failing on their first value.
+    """
+    import pyarrow as pa
+    from pyarrow import csv
+    # pandas treats empty and NA-like fields as missing in text columns as well
+    options = csv.ConvertOptions(strings_can_be_null=True, include_columns=columns or [],
+                                 null_values=csv.ConvertOptions().null_values + PANDAS_NULL_VALUES)
+    with csv.open_csv(file_path, convert_options=options) as reader:
+        schema = reader.schema
+    options.column_types = {field.name: pa.string() for field in schema if pa.types.is_null(field.type)}
+    with csv.open_csv(file_path, convert_options=options) as reader:
+        # Blocks are sized in bytes, so rows are carried over into chunks of chunksize
+        pending = None
+        for batch in reader:
+            table = pa.Table.from_batches([batch])
+            if pending is not None:
+                table = pa.concat_tables([pending, table])
+            while table.num_rows >= chunksize:
+                yield table.slice(0, chunksize)
+                table = table.slice(chunksize)
+            pending = table
+        if pending is not None and pending.num_rows:
+            yield pending
+
+def _excel_frames(file_path: str, chunksize: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Rows of the active sheet as untyped frames of at most chunksize rows"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = list(header)
+        keep = [header.index(column) for column in columns] if columns is not None else None
+        names = header if keep is None else columns
+        batch = []
+        for row in rows:
+            batch.append(row if keep is None else [row[i] if i < len(row) else None for i in keep])
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch, columns=names)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=names)
+    finally:
+        workbook.close()
+
+def iter_data_file(file_path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    """Yield a data file as consecutive frames of at most chunksize rows.
+
+    Chunks use the same Arrow-backed types as read_data_file, so streamed
+    source keys render exactly like those of a fully loaded file.
+    """
+    path = Path(file_path)
+    suffix = path.suffix.lower()
+    if suffix == '.csv':
+        try:
+            for table in _csv_tables(file_path, chunksize):
+                yield _arrow_to_pandas(table, True)
+        except ImportError:
+            with pd.read_csv(file_path, chunksize=chunksize) as reader:
+                yield from reader
+        return
+
+    if suffix == '.parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(file_path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield _arrow_to_pandas(batch, True)
+        return
+
+    if suffix in ARROW_SUFFIXES:
+        import pyarrow as pa
+        with pa.memory_map(str(file_path)) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                for offset in range(0, batch.num_rows, chunksize):
+                    yield _arrow_to_pandas(batch.slice(offset, chunksize), True)
+        return
+
+    for frame in _excel_frames(file_path, chunksize):
+        yield frame.convert_dtypes(dtype_backend='pyarrow')
+
+class ChunkWriter:
+    """Writes a frame to a file one chunk at a time; columns follow the first chunk.
+
+    Chunks go to a temporary sibling that replaces file_path only when the
+    writer closes without an error, so a cancelled or failed run never leaves
+    a well-formed but truncated output behind.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        path = Path(file_path)
+        self.partial_path = str(path.with_name(f"{path.name}.{threading.get_ident()}.partial"))
+        self.columns: Optional[List[str]] = None
+
+    def write(self, chunk: pd.DataFrame):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self._write_first(chunk)
+        else:
+            self._write_next(chunk.reindex(columns=self.columns))
+
+    def _write_first(self, chunk: pd.DataFrame):
+        self._write_next(chunk)
+
+    def _write_next(self, chunk: pd.DataFrame):
+        raise NotImplementedError
+
+    def close(self):
+        if self.columns is None:
+            # Nothing was written; still leave an empty output behind
+            self.write(pd.DataFrame())
+        self._finish()
+        os.replace(self.partial_path, self.file_path)
+
+    def _finish(self):
+        """Complete the partial file"""
+
+    def abort(self):
+        """Discard everything written; file_path is left as it was"""
+        Path(self.partial_path).unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+            return
+        try:
+            self.close()
+        except BaseException:
+            self.abort()
+            raise
+
+class CsvChunkWriter(ChunkWriter):
+    """Appends frames to a CSV file, writing the header with the first chunk"""
+
+    def _write_first(self, chunk: pd.DataFrame):
+        chunk.to_csv(self.partial_path, index=False, mode='w')
+
+    def _write_next(self, chunk: pd.DataFrame):
+        chunk.to_csv(self.partial_path, index=False, header=False, mode='a')
+
+class ArrowTableWriter(ChunkWriter):
+    """Base of writers that store chunks as Arrow tables of one schema.
+
+    The schema follows the first chunk, except that columns with no values
+    there, which Arrow types as null, are stored as text so later values fit.
+    """
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        self._schema = None
+
+    def _table(self, chunk: pd.DataFrame):
+        import pyarrow as pa
+        # Converted without a schema so NaN becomes null before any cast
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._schema is None:
+            nulls = {field.name for field in table.schema if pa.types.is_null(field.type)}
+            self._schema = pa.schema(
+                [field.with_type(pa.string()) if field.name in nulls else field for field in table.schema],
+                metadata=self._text_metadata(table.schema.metadata, nulls))
+        return table.cast(self._schema)
+
+    @staticmethod
+    def _text_metadata(metadata: Optional[Dict[bytes, bytes]], columns: set) -> Optional[Dict[bytes, bytes]]:
+        """Schema metadata whose pandas entries record the given columns as Arrow text.
+
+        pandas restores the dtypes recorded there on read, and cannot cast text back to null.
+        """
+        if not columns or not metadata or b'pandas' not in metadata:
+            return metadata
+        pandas_metadata = json.loads(metadata[b'pandas'])
+        for entry in pandas_metadata['columns']:
+            if entry['field_name'] in columns:
+                entry.update(pandas_type='unicode', numpy_type='string[pyarrow]')
+        return {**metadata, b'pandas': json.dumps(pandas_metadata).encode()}
+
+class ParquetChunkWriter(ArrowTableWriter):
+    """Appends each chunk as a row group of one Parquet file"""
+
+    def __init__(self, file_path: str, compression: Optional[str] = None):
+        super().__init__(file_path)
+        self.compression = compression or 'snappy'
+        self._writer = None
+
+    def _write_next(self, chunk: pd.DataFrame):
+        import pyarrow.parquet as pq
+        table = self._table(chunk)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.partial_path, self._schema, compression=self.compression)
+        self._writer.write_table(table)
+
+    def _finish(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def abort(self):
+        self._finish()
+        super().abort()
+
+class ArrowChunkWriter(ArrowTableWriter):
+    """Appends each chunk as record batches of a Feather v2 / Arrow IPC file"""
+
+    def __init__(self, file_path: str, compression: Optional[str] = None):
+        super().__init__(file_path)
+        self.compression = None if compression in (None, 'uncompressed', 'none') else compression
+        self._sink = None
+        self._writer = None
+
+    def _write_next(self, chunk: pd.DataFrame):
+        import pyarrow as pa
+        table = self._table(chunk)
+        if self._writer is None:
+            self._sink = pa.OSFile(self.partial_path, 'wb')
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = pa.ipc.new_file(self._sink, self._schema, options=options)
+        self._writer.write_table(table)
+
+    def _finish(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._writer = None
+
+    def abort(self):
+        self._finish()
+        super().abort()
+
+class ExcelChunkWriter(ChunkWriter):
+    """Streams rows into a write-only workbook so memory stays flat while exporting"""
+    # Rows per sheet, leaving room for the header
+    MAX_SHEET_ROWS = 1_048_575
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        from openpyxl import Workbook
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._sheet_rows = 0
+
+    def _new_sheet(self):
+        self._sheet = self._workbook.create_sheet(f"Sheet{len(self._workbook.worksheets) + 1}")
+        self._sheet.append([str(column) for column in self.columns])
+        self._sheet_rows = 0
+
+    def _write_next(self, chunk: pd.DataFrame):
+        if self._sheet is None:
+            self._new_sheet()
+        values = chunk.astype(object)
+        values = values.where(values.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if self._sheet_rows >= self.MAX_SHEET_ROWS:
+                self._new_sheet()
+            self._sheet.append(row)
+            self._sheet_rows += 1
+
+    def _finish(self):
+        self._workbook.save(self.partial_path)
+
+    def abort(self):
+        # Write-only sheets hold open temporary files until closed
+        for sheet in self._workbook.worksheets:
+            sheet.close()
+        super().abort()
+
+def open_chunk_writer(file_path: str, compression: Optional[str] = None) -> ChunkWriter:
+    """Chunk writer for the output format implied by the file suffix"""
+    suffix = Path(file_path).suffix.lower()
+    if suffix == '.csv':
+        return CsvChunkWriter(file_path)
+    if suffix == '.parquet':
+        return ParquetChunkWriter(file_path, compression)
+    if suffix in ARROW_SUFFIXES:
+        return ArrowChunkWriter(file_path, compression)
+    if suffix == '.xlsx':
+        return ExcelChunkWriter(file_path)
+    raise ValueError(f"Unsupported output format: {suffix or file_path}")
+
+def stream_match_file(transformer, source_path: str, target_df: pd.DataFrame,
+                      output_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                      compression: Optional[str] = None) -> int:
+    """Match a source file chunk by chunk against target_df, appending results to output_path"""
+    with open_chunk_writer(output_path, compression) as writer:
+        return transformer.stream_match(iter_data_file(source_path, chunksize), target_df, writer.write)
+
+def export_frame(df: pd.DataFrame, file_path: str,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 chunksize: int = DEFAULT_CHUNKSIZE, compression: Optional[str] = None):
+    """Write a frame in chunks to any supported format, reporting (rows written, total rows)"""
+    with open_chunk_writer(file_path, compression) as writer:
+        for start in range(0, len(df), chunksize):
+            writer.write(df.iloc[start:start + chunksize])
+            if progress_callback is not None:
+                progress_callback(min(start + chunksize, len(df)), len(df))
+        if len(df) == 0:
+            writer.write(df)
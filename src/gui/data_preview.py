@@ -1,39 +1,256 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTableView, QHeaderView
+import operator
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView, QHeaderView,
+                            QComboBox, QLineEdit, QLabel)
 from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
 import pandas as pd
 import numpy as np
 
+# Filters starting with an operator compare values; any other text is a substring match
+FILTER_OPERATOR = re.compile(r'^\s*(==|=|!=|>=|<=|>|<)\s*(.*)$')
+COMPARISONS = {
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+}
+
+def format_value(value) -> str:
+    # Handle different data types
+    if pd.isna(value):
+        return ''
+    elif isinstance(value, (float, np.floating)):
+        return f"{value:.2f}"
+    elif isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).strftime('%Y-%m-%d %H:%M:%S')
+    else:
+        return str(value)
+
+def _evaluate(values: pd.Series, predicate: Callable[[pd.Series], pd.Series],
+              per_value: bool = False) -> np.ndarray:
+    """Boolean row mask of predicate.
+
+    Categoricals are evaluated once per category; with per_value, which suits
+    costly string predicates, other columns are evaluated once per distinct value.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    elif per_value:
+        codes, uniques = pd.factorize(values)
+    else:
+        return predicate(values).fillna(False).to_numpy(dtype=bool)
+    matches = predicate(pd.Series(uniques)).fillna(False).to_numpy(dtype=bool)
+    # Code -1 (missing) picks the trailing False
+    return np.append(matches, False)[codes]
+
+def filter_mask(values: pd.Series, text: str) -> np.ndarray:
+    """Rows matching a filter: a case-insensitive substring, or a comparison such as '>= 10'"""
+    match = FILTER_OPERATOR.match(text)
+    if match is None:
+        return _evaluate(values, lambda v: v.astype(str).str.contains(text, case=False, regex=False),
+                         per_value=True)
+
+    compare = COMPARISONS[match.group(1)]
+    operand = match.group(2).strip()
+    dtype = values.dtype.categories.dtype if isinstance(values.dtype, pd.CategoricalDtype) else values.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return _evaluate(values, lambda v: compare(v.astype(str).str.lower(), operand.lower()), per_value=True)
+    if pd.api.types.is_numeric_dtype(dtype):
+        try:
+            number = float(operand)
+        except ValueError:
+            raise ValueError(f"'{operand}' is not a number") from None
+        return _evaluate(values, lambda v: compare(v, number))
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        try:
+            timestamp = pd.Timestamp(operand)
+        except ValueError:
+            raise ValueError(f"'{operand}' is not a date") from None
+        return _evaluate(values, lambda v: _compare_dates(compare, v, timestamp))
+    return _evaluate(values, lambda v: compare(v.astype(str), operand), per_value=True)
+
+def _compare_dates(compare: Callable, values: pd.Series, timestamp: pd.Timestamp) -> pd.Series:
+    # Arrow date columns only compare with dates, so compare as datetime64 in the column's time zone
+    dates = pd.to_datetime(values)
+    tz = dates.dt.tz
+    timestamp = timestamp.tz_localize(tz) if timestamp.tz is None else timestamp.tz_convert(tz)
+    return compare(dates, timestamp)
+
+def sort_codes(values: pd.Series) -> np.ndarray:
+    """Rank of each value among the column's sorted distinct values; missing values rank last"""
+    try:
+        codes, uniques = pd.factorize(values, sort=True)
+    except TypeError:
+        # Mixed types that do not compare: sort by their text
+        codes, uniques = pd.factorize(values.astype(str).where(values.notna()), sort=True)
+    return np.where(codes < 0, len(uniques), codes)
+
+def argsort_codes(codes: np.ndarray) -> np.ndarray:
+    """Stable argsort of non-negative ranks; ranks that fit 16 bits take NumPy's radix sort"""
+    narrow = codes.astype(np.min_scalar_type(codes.max(initial=0)), copy=False)
+    return np.argsort(narrow, kind='stable')
+
 class PandasTableModel(QAbstractTableModel):
+    """Table model that formats cells a block of rows at a time.
+
+    Display strings are cached per (column, block) in a bounded LRU and null
+    masks are computed once per column, so painting never touches iloc.
+
+    Sorting and filtering never copy the frame: they produce an array of
+    source row positions that view rows are mapped through. Sort ranks and
+    filter masks are vectorized and cached per column, so re-sorting or
+    combining filters on millions of rows takes milliseconds.
+    """
+    BLOCK_SIZE = 256
+    MAX_CACHED_BLOCKS = 2048
+    # Sorted row orders kept, so toggling between recent sorts is instant
+    MAX_CACHED_SORTS = 4
+
     def __init__(self, data: pd.DataFrame):
         super().__init__()
         self._data = data
+        self._columns = [data.iloc[:, i] for i in range(data.shape[1])]
+        self._null_masks = {}
+        self._blocks = OrderedDict()
+        # Source row of each view row, or None while neither sorted nor filtered
+        self._order: Optional[np.ndarray] = None
+        self._sort_codes: Dict[int, np.ndarray] = {}
+        self._sorted_rows: Optional[np.ndarray] = None
+        self._sorts = OrderedDict()
+        self._filters: Dict[int, str] = {}
+        self._filter_masks: Dict[int, np.ndarray] = {}
 
     def rowCount(self, parent=QModelIndex()):
-        return self._data.shape[0]
+        return self._data.shape[0] if self._order is None else len(self._order)
 
     def columnCount(self, parent=QModelIndex()):
         return self._data.shape[1]
 
+    def null_mask(self, col: int) -> np.ndarray:
+        mask = self._null_masks.get(col)
+        if mask is None:
+            mask = self._columns[col].isna().to_numpy(dtype=bool)
+            self._null_masks[col] = mask
+        return mask
+
+    def source_row(self, row: int) -> int:
+        return row if self._order is None else int(self._order[row])
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        if column < 0:
+            self._sorted_rows = None
+            self._update_order()
+            return
+
+        key = (column, order)
+        rows = self._sorts.get(key)
+        if rows is None:
+            codes = self._sort_codes.get(column)
+            if codes is None:
+                codes = sort_codes(self._columns[column])
+                self._sort_codes[column] = codes
+            if order == Qt.SortOrder.DescendingOrder:
+                # Reverse the ranks but keep missing values last
+                nulls = self.null_mask(column)
+                top = codes[~nulls].max(initial=0)
+                codes = np.where(nulls, codes, top - codes)
+            rows = argsort_codes(codes)
+            self._sorts[key] = rows
+            if len(self._sorts) > self.MAX_CACHED_SORTS:
+                self._sorts.popitem(last=False)
+        else:
+            self._sorts.move_to_end(key)
+        self._sorted_rows = rows
+        self._update_order()
+
+    def set_filter(self, column: int, text: str):
+        """Filter rows by one column; empty text removes that column's filter.
+
+        Raises ValueError when a comparison operand does not fit the column's type.
+        """
+        if not text.strip():
+            self._filters.pop(column, None)
+            self._filter_masks.pop(column, None)
+        else:
+            self._filter_masks[column] = filter_mask(self._columns[column], text) & ~self.null_mask(column)
+            self._filters[column] = text
+        self._update_order()
+
+    def filter_text(self, column: int) -> str:
+        return self._filters.get(column, '')
+
+    def is_filtered(self) -> bool:
+        return bool(self._filters)
+
+    def source_row_count(self) -> int:
+        return self._data.shape[0]
+
+    def _update_order(self):
+        self.beginResetModel()
+        mask = None
+        for column_mask in self._filter_masks.values():
+            mask = column_mask if mask is None else mask & column_mask
+        if mask is None:
+            self._order = self._sorted_rows
+        elif self._sorted_rows is None:
+            self._order = np.flatnonzero(mask)
+        else:
+            self._order = self._sorted_rows[mask[self._sorted_rows]]
+        # Cached blocks hold view rows, which now map to different source rows
+        self._blocks.clear()
+        self.endResetModel()
+
+    def display_block(self, col: int, block: int) -> list:
+        key = (col, block)
+        strings = self._blocks.get(key)
+        if strings is not None:
+            self._blocks.move_to_end(key)
+            return strings
+
+        start = block * self.BLOCK_SIZE
+        strings = self._format_rows(col, start, start + self.BLOCK_SIZE)
+        self._blocks[key] = strings
+        if len(self._blocks) > self.MAX_CACHED_BLOCKS:
+            self._blocks.popitem(last=False)
+        return strings
+
+    def _format_rows(self, col: int, start: int, stop: int) -> list:
+        if self._order is None:
+            values = self._columns[col].iloc[start:stop]
+            nulls = self.null_mask(col)[start:stop]
+        else:
+            rows = self._order[start:stop]
+            values = self._columns[col].take(rows)
+            nulls = self.null_mask(col)[rows]
+        dtype = values.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Format each category once and look the strings up by code
+            labels = np.array([format_value(value) for value in dtype.categories] + [''], dtype=object)
+            formatted = labels[values.cat.codes.to_numpy()].tolist()
+        elif pd.api.types.is_float_dtype(dtype):
+            formatted = [f"{value:.2f}" for value in values.to_numpy(dtype=float, na_value=np.nan)]
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            formatted = values.dt.strftime('%Y-%m-%d %H:%M:%S').tolist()
+        elif pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            formatted = values.astype(object).map(str).tolist()
+        else:
+            formatted = [format_value(value) for value in values.tolist()]
+        return ['' if null else text for text, null in zip(formatted, nulls)]
+
+    def column_sample(self, col: int, rows: int = 100) -> list:
+        """Display strings of the first rows of a column, for sizing"""
+        return self._format_rows(col, 0, rows)
+
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if not index.isValid():
             return None
 
         if role == Qt.ItemDataRole.DisplayRole:
-            value = self._data.iloc[index.row(), index.column()]
-            
-            # Handle different data types
-            if pd.isna(value):
-                return ''
-            elif isinstance(value, (float, np.floating)):
-                return f"{value:.2f}"
-            elif isinstance(value, (pd.Timestamp, np.datetime64)):
-                return value.strftime('%Y-%m-%d %H:%M:%S')
-            else:
-                return str(value)
+            block, offset = divmod(index.row(), self.BLOCK_SIZE)
+            return self.display_block(index.column(), block)[offset]
 
         elif role == Qt.ItemDataRole.BackgroundRole:
-            value = self._data.iloc[index.row(), index.column()]
-            if pd.isna(value):
+            if self.null_mask(index.column())[self.source_row(index.row())]:
                 return Qt.GlobalColor.lightGray
 
         return None
@@ -43,29 +260,110 @@ class PandasTableModel(QAbstractTableModel):
             if orientation == Qt.Orientation.Horizontal:
                 return str(self._data.columns[section])
             else:
-                return str(section + 1)
+                # Rows keep their original numbers when sorted or filtered
+                return str(self.source_row(section) + 1)
         return None
 
 class DataPreviewWidget(QWidget):
+    # Rows measured when sizing columns; measuring every row is too slow on big frames
+    SIZING_SAMPLE_ROWS = 100
+    MAX_COLUMN_WIDTH = 300
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setup_ui()
-        
+
     def setup_ui(self):
         layout = QVBoxLayout(self)
-        
+
+        # Filter bar: one filter per column, combined with AND
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Filter:"))
+        self.filter_column = QComboBox()
+        self.filter_column.currentIndexChanged.connect(self.on_filter_column_changed)
+        filter_layout.addWidget(self.filter_column)
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Text to find, or a comparison such as >= 10")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.on_filter_changed)
+        filter_layout.addWidget(self.filter_edit, 1)
+        self.row_count_label = QLabel()
+        filter_layout.addWidget(self.row_count_label)
+        layout.addLayout(filter_layout)
+
         # Create table view
         self.table_view = QTableView()
         self.table_view.setAlternatingRowColors(True)
-        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         self.table_view.horizontalHeader().setStretchLastSection(True)
         self.table_view.verticalHeader().setVisible(True)
-        
+        # Fixed row heights avoid measuring rows while scrolling
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        # Header clicks sort inside the model, starting unsorted
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table_view.setSortingEnabled(True)
+
         layout.addWidget(self.table_view)
-        
+
     def set_data(self, df: pd.DataFrame):
         model = PandasTableModel(df)
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
         self.table_view.setModel(model)
-        
+        self.resize_columns_from_sample(model)
+
+        self.filter_column.blockSignals(True)
+        self.filter_column.clear()
+        self.filter_column.addItems([str(column) for column in df.columns])
+        self.filter_column.blockSignals(False)
+        self.filter_edit.blockSignals(True)
+        self.filter_edit.clear()
+        self.filter_edit.blockSignals(False)
+        self.update_row_count()
+
+    def on_filter_column_changed(self, column: int):
+        model = self.table_view.model()
+        if model is None or column < 0:
+            return
+        # Show the chosen column's own filter
+        self.filter_edit.blockSignals(True)
+        self.filter_edit.setText(model.filter_text(column))
+        self.filter_edit.blockSignals(False)
+        self.update_row_count()
+
+    def on_filter_changed(self, text: str):
+        model = self.table_view.model()
+        column = self.filter_column.currentIndex()
+        if model is None or column < 0:
+            return
+        try:
+            model.set_filter(column, text)
+        except (ValueError, TypeError) as e:
+            self.row_count_label.setText(str(e))
+            return
+        self.update_row_count()
+
+    def update_row_count(self):
+        model = self.table_view.model()
+        if model is None:
+            self.row_count_label.clear()
+            return
+        total = model.source_row_count()
+        if model.is_filtered():
+            self.row_count_label.setText(f"{model.rowCount():,} of {total:,} rows")
+        else:
+            self.row_count_label.setText(f"{total:,} rows")
+
+    def resize_columns_from_sample(self, model: PandasTableModel):
+        metrics = self.table_view.fontMetrics()
+        padding = 2 * metrics.averageCharWidth() + 8
+        for col in range(model.columnCount()):
+            texts = model.column_sample(col, self.SIZING_SAMPLE_ROWS)
+            texts.append(str(model.headerData(col, Qt.Orientation.Horizontal)))
+            width = max(metrics.horizontalAdvance(text) for text in texts) + padding
+            self.table_view.setColumnWidth(col, min(width, self.MAX_COLUMN_WIDTH))
+
     def clear(self):
         self.table_view.setModel(None)
+        self.filter_column.clear()
+        self.filter_edit.clear()
+        self.row_count_label.clear()
@@ -1,10 +1,11 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                             QComboBox, QLabel, QSpinBox, QDoubleSpinBox, 
-                            QLineEdit, QScrollArea, QFrame)
+                            QLineEdit, QScrollArea, QFrame, QCheckBox)
 from PyQt6.QtCore import Qt, pyqtSignal
-from typing import List, Dict
+from typing import Any, Dict, List, Optional
 import pandas as pd
 from ..data_model import MatchRule, TransformRule
+from ..blocking import BLOCKING_METHODS
 
 class RuleEditorWidget(QWidget):
     rule_updated = pyqtSignal()
@@ -15,23 +16,24 @@ class RuleEditorWidget(QWidget):
         self.transform_rules: List[TransformRule] = []
         self.source_columns = []
         self.target_columns = []
+        # Columns of every imported file, in import order
+        self.file_columns: Dict[str, List[str]] = {}
         self.setup_ui()
         
-    def update_columns(self, source_df: pd.DataFrame, target_df: pd.DataFrame):
-        """Update available columns when source files are imported"""
-        self.source_columns = list(source_df.columns)
-        self.target_columns = list(target_df.columns)
+    def update_files(self, frames: Dict[str, pd.DataFrame]):
+        """Update available files and columns when files are imported"""
+        self.file_columns = {name: list(df.columns) for name, df in frames.items()}
+        names = list(self.file_columns)
+        self.source_columns = self.file_columns[names[0]] if names else []
+        self.target_columns = self.file_columns[names[1]] if len(names) > 1 else []
         
         # Update existing rule widgets
         for i in range(self.match_container_layout.count()):
             widget = self.match_container_layout.itemAt(i).widget()
             if isinstance(widget, MatchRuleWidget):
-                widget.update_columns(self.source_columns, self.target_columns)
-                
-        for i in range(self.transform_container_layout.count()):
-            widget = self.transform_container_layout.itemAt(i).widget()
-            if isinstance(widget, TransformRuleWidget):
-                widget.update_columns(self.source_columns + self.target_columns)
+                widget.update_files(self.file_columns)
+        
+        self.refresh_transform_columns()
         
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -79,17 +81,33 @@ class RuleEditorWidget(QWidget):
     
     def add_match_rule_widget(self):
         rule_widget = MatchRuleWidget(self)
-        rule_widget.update_columns(self.source_columns, self.target_columns)
+        rule_widget.update_files(self.file_columns)
         rule_widget.rule_changed.connect(self.update_rules)
         self.match_container_layout.addWidget(rule_widget)
         
     def add_transform_rule_widget(self):
         rule_widget = TransformRuleWidget(self)
-        rule_widget.update_columns(self.source_columns + self.target_columns)
         rule_widget.rule_changed.connect(self.update_rules)
         self.transform_container_layout.addWidget(rule_widget)
+        self.refresh_transform_columns()
+    
+    def refresh_transform_columns(self):
+        """Offer each transform rule the imported columns plus the outputs of the rules above it"""
+        columns = list(dict.fromkeys(
+            column for file_columns in self.file_columns.values() for column in file_columns))
+        for i in range(self.transform_container_layout.count()):
+            widget = self.transform_container_layout.itemAt(i).widget()
+            if isinstance(widget, TransformRuleWidget):
+                # Refilling the list must not re-trigger update_rules
+                widget.blockSignals(True)
+                widget.update_columns(columns)
+                widget.blockSignals(False)
+                output = widget.target_col.text()
+                if output and output not in columns:
+                    columns = columns + [output]
         
     def update_rules(self):
+        self.refresh_transform_columns()
         # Collect all rules from widgets
         self.match_rules = []
         self.transform_rules = []
@@ -111,13 +129,56 @@ class RuleEditorWidget(QWidget):
                     self.transform_rules.append(rule)
         
         self.rule_updated.emit()
+    
+    def set_rules(self, match_rules: List[MatchRule], transform_rules: List[TransformRule]):
+        """Replace all rule widgets with widgets showing the given rules.
+
+        Raises ValueError, leaving the current rules in place, for rules the
+        widgets cannot show unchanged.
+        """
+        for rule in match_rules:
+            MatchRuleWidget.check_rule(rule)
+        for rule in transform_rules:
+            TransformRuleWidget.check_rule(rule)
+        for layout in (self.match_container_layout, self.transform_container_layout):
+            while layout.count():
+                item = layout.takeAt(0)
+                if item.widget():
+                    item.widget().deleteLater()
+        
+        for rule in match_rules:
+            rule_widget = MatchRuleWidget(self)
+            rule_widget.update_files(self.file_columns)
+            rule_widget.set_rule(rule)
+            rule_widget.rule_changed.connect(self.update_rules)
+            self.match_container_layout.addWidget(rule_widget)
+            
+        for rule in transform_rules:
+            rule_widget = TransformRuleWidget(self)
+            rule_widget.set_rule(rule)
+            rule_widget.rule_changed.connect(self.update_rules)
+            self.transform_container_layout.addWidget(rule_widget)
+        
+        self.update_rules()
 
 class MatchRuleWidget(QWidget):
     rule_changed = pyqtSignal()
+    MATCH_TYPES = ["exact", "fuzzy"]
+    THRESHOLD_DECIMALS = 4
     
     def __init__(self, parent=None):
         super().__init__(parent)
         layout = QHBoxLayout(self)
+        self.file_columns: Dict[str, List[str]] = {}
+        # Parameters of a loaded rule's blocking method, which have no widgets
+        self.blocking_params: Dict[str, Any] = {}
+        self.blocking_params_method: Optional[str] = None
+        
+        # File pickers are only shown once more than two files are loaded
+        self.source_file = QComboBox()
+        self.source_file.setToolTip("Source file")
+        self.target_file = QComboBox()
+        self.target_file.setToolTip("Target file")
         
         self.source_col = QComboBox()
         self.source_col.setPlaceholderText("Source Column")
@@ -128,9 +189,10 @@ class MatchRuleWidget(QWidget):
         self.target_col.setMinimumWidth(150)
         
         self.match_type = QComboBox()
-        self.match_type.addItems(["exact", "fuzzy"])
+        self.match_type.addItems(self.MATCH_TYPES)
         
         self.threshold = QDoubleSpinBox()
+        self.threshold.setDecimals(self.THRESHOLD_DECIMALS)
         self.threshold.setRange(0, 1)
         self.threshold.setSingleStep(0.1)
         self.threshold.setValue(0.9)
@@ -138,27 +200,73 @@ class MatchRuleWidget(QWidget):
         self.case_sensitive = QComboBox()
         self.case_sensitive.addItems(["Case Insensitive", "Case Sensitive"])
         
+        # Normalization applied to both columns before comparing
+        self.strip_whitespace = QCheckBox("Trim")
+        self.strip_whitespace.setToolTip("Trim values and collapse runs of whitespace")
+        self.strip_punctuation = QCheckBox("No Punct.")
+        self.strip_punctuation.setToolTip("Ignore punctuation")
+        self.remove_accents = QCheckBox("No Accents")
+        self.remove_accents.setToolTip("Ignore accents, so é matches e")
+        
+        self.blocking = QComboBox()
+        self.blocking.addItems(["No Blocking"] + BLOCKING_METHODS)
+        
         delete_btn = QPushButton("Delete")
         delete_btn.clicked.connect(self.deleteLater)
         delete_btn.clicked.connect(self.rule_changed)
         
         layout.addWidget(QLabel("Source:"))
+        layout.addWidget(self.source_file)
         layout.addWidget(self.source_col)
         layout.addWidget(QLabel("Target:"))
+        layout.addWidget(self.target_file)
         layout.addWidget(self.target_col)
         layout.addWidget(QLabel("Match:"))
         layout.addWidget(self.match_type)
         layout.addWidget(QLabel("Threshold:"))
         layout.addWidget(self.threshold)
         layout.addWidget(self.case_sensitive)
+        layout.addWidget(self.strip_whitespace)
+        layout.addWidget(self.strip_punctuation)
+        layout.addWidget(self.remove_accents)
+        layout.addWidget(QLabel("Blocking:"))
+        layout.addWidget(self.blocking)
         layout.addWidget(delete_btn)
         
         # Connect signals
+        self.source_file.currentTextChanged.connect(self.on_file_changed)
+        self.target_file.currentTextChanged.connect(self.on_file_changed)
         self.source_col.currentTextChanged.connect(self.rule_changed)
         self.target_col.currentTextChanged.connect(self.rule_changed)
         self.match_type.currentTextChanged.connect(self.rule_changed)
         self.threshold.valueChanged.connect(self.rule_changed)
         self.case_sensitive.currentTextChanged.connect(self.rule_changed)
+        for check in (self.strip_whitespace, self.strip_punctuation, self.remove_accents):
+            check.toggled.connect(self.rule_changed)
+        self.blocking.currentTextChanged.connect(self.rule_changed)
+    
+    def update_files(self, file_columns: Dict[str, List[str]]):
+        """Update available files; the first and second file are the defaults"""
+        self.file_columns = file_columns
+        names = list(file_columns)
+        for combo, default in ((self.source_file, 0), (self.target_file, 1)):
+            current = combo.currentText()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItems(names)
+            if current in names:
+                combo.setCurrentText(current)
+            elif len(names) > default:
+                combo.setCurrentIndex(default)
+            combo.blockSignals(False)
+            combo.setVisible(len(names) > 2)
+        self.update_columns(file_columns.get(self.source_file.currentText(), []),
+                            file_columns.get(self.target_file.currentText(), []))
+    
+    def on_file_changed(self):
+        self.update_columns(self.file_columns.get(self.source_file.currentText(), []),
+                            self.file_columns.get(self.target_file.currentText(), []))
+        self.rule_changed.emit()
     
     def update_columns(self, source_columns: List[str], target_columns: List[str]):
         """Update available columns in dropdowns"""
@@ -175,32 +283,95 @@ class MatchRuleWidget(QWidget):
         if current_target in target_columns:
             self.target_col.setCurrentText(current_target)
     
+    @classmethod
+    def check_rule(cls, rule: MatchRule):
+        if rule.match_type not in cls.MATCH_TYPES:
+            raise ValueError(f"Match type '{rule.match_type}' of {rule.source_column} cannot be edited")
+        if rule.blocking is not None and rule.blocking not in BLOCKING_METHODS:
+            raise ValueError(f"Blocking method '{rule.blocking}' of {rule.source_column} cannot be edited")
+        if not 0 <= rule.threshold <= 1 or round(rule.threshold, cls.THRESHOLD_DECIMALS) != rule.threshold:
+            raise ValueError(f"Threshold {rule.threshold} of {rule.source_column} is not between 0 and 1 "
+                             f"with at most {cls.THRESHOLD_DECIMALS} decimals")
+    
+    def set_rule(self, rule: MatchRule):
+        names = list(self.file_columns)
+        for combo, file_name, default in ((self.source_file, rule.source_file, 0),
+                                          (self.target_file, rule.target_file, 1)):
+            if file_name is None:
+                if len(names) > default:
+                    combo.setCurrentIndex(default)
+                continue
+            if combo.findText(file_name) < 0:
+                combo.addItem(file_name)
+                combo.setVisible(True)
+            combo.setCurrentText(file_name)
+        # Saved columns may not be loaded yet; keep them selectable anyway
+        for combo, column in ((self.source_col, rule.source_column), (self.target_col, rule.target_column)):
+            if combo.findText(column) < 0:
+                combo.addItem(column)
+            combo.setCurrentText(column)
+        self.match_type.setCurrentText(rule.match_type)
+        self.threshold.setValue(rule.threshold)
+        self.case_sensitive.setCurrentIndex(1 if rule.case_sensitive else 0)
+        self.strip_whitespace.setChecked(rule.strip_whitespace)
+        self.strip_punctuation.setChecked(rule.strip_punctuation)
+        self.remove_accents.setChecked(rule.remove_accents)
+        self.blocking.setCurrentText(rule.blocking or "No Blocking")
+        self.blocking_params = dict(rule.blocking_params)
+        self.blocking_params_method = rule.blocking
+    
     def get_rule(self) -> MatchRule:
+        # The default files are saved as None so rule sets work with other file names
+        names = list(self.file_columns)
+        source_file = self.source_file.currentText() or None
+        if names and source_file == names[0]:
+            source_file = None
+        target_file = self.target_file.currentText() or None
+        if len(names) > 1 and target_file == names[1]:
+            target_file = None
+        blocking = self.blocking.currentText() if self.blocking.currentIndex() > 0 else None
+        # Loaded parameters only apply to the method they were saved with
+        blocking_params = dict(self.blocking_params) if blocking == self.blocking_params_method else {}
         return MatchRule(
             source_column=self.source_col.currentText(),
             target_column=self.target_col.currentText(),
             match_type=self.match_type.currentText(),
             threshold=self.threshold.value(),
-            case_sensitive=self.case_sensitive.currentText() == "Case Sensitive"
+            case_sensitive=self.case_sensitive.currentText() == "Case Sensitive",
+            blocking=blocking,
+            blocking_params=blocking_params,
+            source_file=source_file,
+            target_file=target_file,
+            strip_whitespace=self.strip_whitespace.isChecked(),
+            strip_punctuation=self.strip_punctuation.isChecked(),
+            remove_accents=self.remove_accents.isChecked()
         )
 
 class TransformRuleWidget(QWidget):
     rule_changed = pyqtSignal()
+    TRANSFORM_TYPES = ["date_format", "number_format", "concatenate"]
+    DECIMALS_RANGE = (0, 10)
     
     def __init__(self, parent=None):
         super().__init__(parent)
         layout = QHBoxLayout(self)
+        # Columns after the first of a loaded rule, e.g. the rest of a concatenation
+        self.extra_columns: List[str] = []
+        # Parameters of a loaded rule that have no widgets, kept while its type is selected
+        self.parameters: Dict[str, Any] = {}
+        self.parameters_type: Optional[str] = None
         
         self.source_cols = QComboBox()
         self.source_cols.setPlaceholderText("Source Column")
         self.source_cols.setMinimumWidth(150)
+        self.extra_columns_label = QLabel()
         
         self.target_col = QLineEdit()
         self.target_col.setPlaceholderText("New Column Name")
         self.target_col.setMinimumWidth(150)
         
         self.transform_type = QComboBox()
-        self.transform_type.addItems(["date_format", "number_format", "concatenate"])
+        self.transform_type.addItems(self.TRANSFORM_TYPES)
         
         # Add parameter widgets based on transform type
         self.params_widget = QWidget()
@@ -215,6 +386,7 @@ class TransformRuleWidget(QWidget):
         
         layout.addWidget(QLabel("Source:"))
         layout.addWidget(self.source_cols)
+        layout.addWidget(self.extra_columns_label)
         layout.addWidget(QLabel("Target:"))
         layout.addWidget(self.target_col)
         layout.addWidget(QLabel("Type:"))
@@ -237,11 +409,14 @@ class TransformRuleWidget(QWidget):
         transform_type = self.transform_type.currentText()
         
         if transform_type == "date_format":
+            # Editable, so any strftime format can be typed or loaded
             self.source_format = QComboBox()
+            self.source_format.setEditable(True)
             self.source_format.addItems([
                 "%m/%d/%Y", "%Y-%m-%d", "%d-%m-%Y", "%Y/%m/%d"
             ])
             self.target_format = QComboBox()
+            self.target_format.setEditable(True)
             self.target_format.addItems([
                 "%Y-%m-%d", "%m/%d/%Y", "%d-%m-%Y", "%Y/%m/%d"
             ])
@@ -256,7 +431,7 @@ class TransformRuleWidget(QWidget):
             
         elif transform_type == "number_format":
             self.decimals = QSpinBox()
-            self.decimals.setRange(0, 10)
+            self.decimals.setRange(*self.DECIMALS_RANGE)
             self.decimals.setValue(2)
             
             self.params_layout.addWidget(QLabel("Decimals:"))
@@ -280,9 +455,42 @@ class TransformRuleWidget(QWidget):
         current = self.source_cols.currentText()
         self.source_cols.clear()
         self.source_cols.addItems(columns)
-        if current in columns:
+        if current:
+            # Keep a loaded or earlier-rule column selected even if it is not offered yet
+            if current not in columns:
+                self.source_cols.addItem(current)
             self.source_cols.setCurrentText(current)
     
+    @classmethod
+    def check_rule(cls, rule: TransformRule):
+        if rule.transform_type not in cls.TRANSFORM_TYPES:
+            raise ValueError(f"Transform type '{rule.transform_type}' of {rule.target_column} cannot be edited")
+        decimals = rule.parameters.get("decimals", 2)
+        if rule.transform_type == "number_format" and not (
+                isinstance(decimals, int) and cls.DECIMALS_RANGE[0] <= decimals <= cls.DECIMALS_RANGE[1]):
+            raise ValueError(f"Decimals {decimals!r} of {rule.target_column} cannot be edited")
+    
+    def set_rule(self, rule: TransformRule):
+        column = rule.source_columns[0] if rule.source_columns else ""
+        if self.source_cols.findText(column) < 0:
+            self.source_cols.addItem(column)
+        self.source_cols.setCurrentText(column)
+        self.extra_columns = list(rule.source_columns[1:])
+        self.extra_columns_label.setText(f"+ {', '.join(self.extra_columns)}" if self.extra_columns else "")
+        self.target_col.setText(rule.target_column)
+        self.transform_type.setCurrentText(rule.transform_type)
+        
+        params = rule.parameters
+        self.parameters = dict(params)
+        self.parameters_type = rule.transform_type
+        if rule.transform_type == "date_format":
+            self.source_format.setCurrentText(params.get("source_format", ""))
+            self.target_format.setCurrentText(params.get("target_format", ""))
+        elif rule.transform_type == "number_format":
+            self.decimals.setValue(params.get("decimals", 2))
+        elif rule.transform_type == "concatenate":
+            self.separator.setText(params.get("separator", " "))
+    
     def get_rule(self) -> TransformRule:
         transform_type = self.transform_type.currentText()
         params = {}
@@ -300,9 +508,11 @@ class TransformRuleWidget(QWidget):
             params = {
                 "separator": self.separator.text()
             }
+        if transform_type == self.parameters_type:
+            params = {**self.parameters, **params}
             
         return TransformRule(
-            source_columns=[self.source_cols.currentText()],
+            source_columns=[self.source_cols.currentText()] + self.extra_columns,
             target_column=self.target_col.text(),
             transform_type=transform_type,
             parameters=params
@@ -0,0 +1,40 @@
+from PyQt6.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView
+from PyQt6.QtCore import Qt
+from ..file_io import format_bytes
+from ..instrumentation import RunLog
+
+class RunStatsWidget(QTableWidget):
+    """Table of the stages of the last operation: time, throughput and memory"""
+    HEADERS = ["Stage", "Time", "Rows", "Rows/s", "Pairs Scored", "Peak RSS", "Note"]
+
+    def __init__(self, parent=None):
+        super().__init__(0, len(self.HEADERS), parent)
+        self.setHorizontalHeaderLabels(self.HEADERS)
+        self.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.verticalHeader().setVisible(False)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.horizontalHeader().setStretchLastSection(True)
+
+    def show_run(self, run_log: RunLog):
+        self.setRowCount(len(run_log.stages))
+        for row, stage in enumerate(run_log.stages):
+            note = "cached" if stage.cached else ""
+            if stage.error is not None:
+                note = f"failed: {stage.error_summary}"
+            cells = [
+                stage.name,
+                f"{stage.seconds:.3f}s",
+                f"{stage.rows:,}",
+                f"{stage.rows_per_second:,.0f}",
+                f"{stage.pairs_scored:,}",
+                format_bytes(stage.peak_rss_bytes),
+                note,
+            ]
+            for col, text in enumerate(cells):
+                item = QTableWidgetItem(text)
+                if col == 6 and stage.error is not None:
+                    item.setToolTip(stage.error)
+                if 0 < col < 6:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                self.setItem(row, col, item)
+        self.setToolTip(f"{run_log.operation}: {run_log.seconds:.2f}s total")
@@ -0,0 +1,37 @@
+from typing import Any, Callable
+from PyQt6.QtCore import QThread, pyqtSignal
+from ..data_model import OperationCancelled
+
+class PipelineWorker(QThread):
+    """Runs one pipeline stage off the GUI thread.
+
+    The task is called with the worker so it can report progress; reporting
+    also checks for cancellation and raises OperationCancelled when requested.
+    """
+    progress = pyqtSignal(int, int)
+    result_ready = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, task: Callable[['PipelineWorker'], Any], parent=None):
+        super().__init__(parent)
+        self.task = task
+        self._cancel_requested = False
+
+    def cancel(self):
+        self._cancel_requested = True
+
+    def report(self, done: int, total: int):
+        if self._cancel_requested:
+            raise OperationCancelled()
+        self.progress.emit(done, total)
+
+    def run(self):
+        try:
+            result = self.task(self)
+        except OperationCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.result_ready.emit(result)
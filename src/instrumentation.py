@@ -0,0 +1,138 @@
+"""Per-stage timings, throughput and peak memory of pipeline runs"""
+import cProfile
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import ContextManager, Iterator, List, Optional
+from .file_io import format_bytes
+
+# Run logs and profiles written by the desktop app
+RUN_LOG_DIR = Path.home() / '.data_transform_match'
+RUN_LOG_PATH = RUN_LOG_DIR / 'run_log.jsonl'
+
+def peak_rss_bytes() -> int:
+    """High-water mark of this process's resident memory, or 0 when unknown"""
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil reports the peak working set when installed
+        try:
+            import psutil
+        except ImportError:
+            return 0
+        return int(getattr(psutil.Process().memory_info(), 'peak_wset', 0))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return int(peak if sys.platform == 'darwin' else peak * 1024)
+
+@dataclass
+class StageStats:
+    name: str
+    seconds: float = 0.0
+    rows: int = 0
+    pairs_scored: int = 0
+    # Process high-water mark when the stage ended
+    peak_rss_bytes: int = 0
+    cached: bool = False
+    error: Optional[str] = None
+
+    @property
+    def error_summary(self) -> str:
+        """First line of the error, for tables"""
+        return (self.error or '').strip().split('\n')[0]
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), 'rows_per_second': round(self.rows_per_second, 1)}
+
+class RunLog:
+    """Stages of one operation, e.g. an import or an apply of match and transform rules"""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.started = datetime.now()
+        self.stages: List[StageStats] = []
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0) -> Iterator[StageStats]:
+        """Time the enclosed code; the caller may fill in rows, pairs and flags"""
+        stats = StageStats(name, rows=rows)
+        start = time.perf_counter()
+        try:
+            yield stats
+        except Exception as e:
+            stats.error = str(e) or type(e).__name__
+            raise
+        finally:
+            stats.seconds = time.perf_counter() - start
+            stats.peak_rss_bytes = peak_rss_bytes()
+            self.stages.append(stats)
+
+    def add(self, stats: StageStats):
+        if not stats.peak_rss_bytes:
+            stats.peak_rss_bytes = peak_rss_bytes()
+        self.stages.append(stats)
+
+    @property
+    def seconds(self) -> float:
+        return sum(stage.seconds for stage in self.stages)
+
+    def to_dict(self) -> dict:
+        return {
+            'operation': self.operation,
+            'started': self.started.isoformat(timespec='seconds'),
+            'seconds': round(self.seconds, 4),
+            'peak_rss_bytes': max((stage.peak_rss_bytes for stage in self.stages), default=0),
+            'stages': [stage.to_dict() for stage in self.stages],
+        }
+
+    def append_to(self, path):
+        """Append this run as one JSON line"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict()) + '\n')
+
+    def summary(self) -> str:
+        lines = [f"{'Stage':<32} {'Time':>9} {'Rows':>11} {'Rows/s':>11} {'Pairs':>13} {'Peak RSS':>10}"]
+        for stage in self.stages:
+            note = " (cached)" if stage.cached else ""
+            if stage.error is not None:
+                note = f" (failed: {stage.error_summary})"
+            lines.append(
+                f"{stage.name[:32]:<32} {stage.seconds:>8.3f}s {stage.rows:>11,} "
+                f"{stage.rows_per_second:>11,.0f} {stage.pairs_scored:>13,} "
+                f"{format_bytes(stage.peak_rss_bytes):>10}{note}"
+            )
+        return "\n".join(lines)
+
+def record_stage(run_log: Optional[RunLog], name: str, rows: int = 0) -> ContextManager[StageStats]:
+    """A timed stage of run_log, or an unrecorded one when there is no log"""
+    if run_log is None:
+        return nullcontext(StageStats(name, rows=rows))
+    return run_log.stage(name, rows)
+
+@contextmanager
+def profiled(path: Optional[str]):
+    """Dump cProfile statistics of the enclosed code to path; does nothing without a path.
+
+    Only the calling thread is profiled, not matching worker processes.
+    """
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
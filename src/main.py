@@ -1,13 +1,37 @@
+import multiprocessing
 import sys
+import time
+from datetime import datetime
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QSplitter, QPushButton, QLabel, 
-                            QFileDialog, QTableView, QStatusBar, QTabWidget)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+                            QFileDialog, QTableView, QStatusBar, QTabWidget,
+                            QProgressBar, QCheckBox, QComboBox, QSpinBox)
+from PyQt6.QtCore import Qt, QTimer
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from .gui.data_preview import DataPreviewWidget
 from .gui.rule_editor import RuleEditorWidget
-from .data_model import DataTransformer
+from .gui.run_stats import RunStatsWidget
+from .gui.worker import PipelineWorker
+from .data_model import DataTransformer, stratified_sample
+from .file_cache import ParsedFileCache
+from .instrumentation import RUN_LOG_DIR, RUN_LOG_PATH, RunLog, StageStats, profiled
+from .match_plan import JoinGraph
+from .rules import load_rule_set, save_rule_set
+from .file_io import (DATA_FILE_FILTER, EXPORT_FILE_FILTER, PREVIEW_ROWS, export_frame,
+                      format_bytes, read_files_parallel, stream_match_file)
+
+# Rule edits are previewed on this many source rows once editing pauses this long
+LIVE_PREVIEW_ROWS = 2_000
+LIVE_PREVIEW_DELAY_MS = 150
+MATCH_MODE_LABELS = [
+    ("Best Match", 'best'),
+    ("Top-k Candidates", 'top_k'),
+    ("Left Join", 'left'),
+    ("Outer Join", 'outer'),
+    ("Unmatched Targets", 'anti'),
+]
 
 class DataTransformApp(QMainWindow):
     def __init__(self):
@@ -19,6 +43,30 @@ class DataTransformApp(QMainWindow):
         self.source_data = {}
         self.transformed_data = None
         self.transformer = DataTransformer()
+        # Large fuzzy matches are sharded across every core
+        self.transformer.match_workers = None
+        self.worker = None
+        # Stages of the running operation and where its profile goes, if requested
+        self.current_run = None
+        self.profile_path = None
+        # Full files load here while their previews are already shown
+        self.loader = None
+        self.load_generation = 0
+        self.preview_widgets = {}
+        self.apply_when_loaded = False
+        # Files loaded with only the columns the rules read, by name
+        self.lean_files = {}
+        # Parsed copies of imported files; unchanged files skip parsing on re-import
+        self.file_cache = ParsedFileCache()
+        # Live preview of rule edits: its own transformer, so its caches and
+        # runs never disturb the full apply
+        self.preview_transformer = DataTransformer()
+        self.preview_transformer.incremental = False
+        self.preview_worker = None
+        self.preview_generation = 0
+        self.preview_pending = False
+        # (source frame, its sample), kept so unchanged data reuses cached matches
+        self.preview_sample = None
         
         # Setup UI
         self.setup_ui()
@@ -36,11 +84,50 @@ class DataTransformApp(QMainWindow):
         export_btn.clicked.connect(self.export_data)
         apply_btn = QPushButton("Apply Rules")
         apply_btn.clicked.connect(self.apply_rules)
+        stream_btn = QPushButton("Stream Match to File")
+        stream_btn.clicked.connect(self.stream_match)
+        save_rules_btn = QPushButton("Save Rules")
+        save_rules_btn.clicked.connect(self.save_rules)
+        load_rules_btn = QPushButton("Load Rules")
+        load_rules_btn.clicked.connect(self.load_rules)
+        clear_cache_btn = QPushButton("Clear Cache")
+        clear_cache_btn.setToolTip(f"Delete the parsed copies of imported files kept in {self.file_cache.directory}")
+        clear_cache_btn.clicked.connect(self.clear_file_cache)
+        self.profile_check = QCheckBox("Profile Next Run")
+        self.profile_check.setToolTip(f"Save cProfile statistics of the next operation to {RUN_LOG_DIR}")
+        self.mode_combo = QComboBox()
+        for label, mode in MATCH_MODE_LABELS:
+            self.mode_combo.addItem(label, mode)
+        self.mode_combo.setToolTip(
+            "What matching outputs: the best target per source row, the k best with their rank "
+            "and score, every source row, every row of both files, or the target rows nothing matched"
+        )
+        self.mode_combo.currentIndexChanged.connect(self.on_match_mode_changed)
+        self.top_k_spin = QSpinBox()
+        self.top_k_spin.setRange(1, 100)
+        self.top_k_spin.setValue(3)
+        self.top_k_spin.setPrefix("k = ")
+        self.top_k_spin.setEnabled(False)
+        self.top_k_spin.valueChanged.connect(lambda _: self.schedule_live_preview())
+        self.lean_check = QCheckBox("Lean Load")
+        self.lean_check.setToolTip(
+            "Import only the columns the current rules read; the other columns are read "
+            "for the matched rows when rules are applied"
+        )
         
         toolbar.addWidget(import_btn)
         toolbar.addWidget(apply_btn)
         toolbar.addWidget(export_btn)
+        toolbar.addWidget(stream_btn)
+        toolbar.addWidget(save_rules_btn)
+        toolbar.addWidget(load_rules_btn)
+        toolbar.addWidget(clear_cache_btn)
         toolbar.addStretch()
+        toolbar.addWidget(self.mode_combo)
+        toolbar.addWidget(self.top_k_spin)
+        toolbar.addWidget(self.lean_check)
+        toolbar.addWidget(self.profile_check)
+        self.action_buttons = [import_btn, apply_btn, export_btn, stream_btn]
         
         # Main content area
         content_splitter = QSplitter(Qt.Orientation.Horizontal)
@@ -55,14 +142,25 @@ class DataTransformApp(QMainWindow):
         
         # Transformed data preview
         self.transformed_preview = DataPreviewWidget()
-        preview_layout.addWidget(QLabel("Transformed Data"))
+        self.transformed_label = QLabel("Transformed Data")
+        preview_layout.addWidget(self.transformed_label)
         preview_layout.addWidget(self.transformed_preview)
         
+        # Timings of the last operation; every run is also appended to RUN_LOG_PATH
+        self.run_stats = RunStatsWidget()
+        self.run_stats.setMaximumHeight(160)
+        preview_layout.addWidget(QLabel("Run Statistics"))
+        preview_layout.addWidget(self.run_stats)
+        
         content_splitter.addWidget(preview_widget)
         
         # Right side: Rule editor
         self.rule_editor = RuleEditorWidget()
         self.rule_editor.rule_updated.connect(self.on_rules_updated)
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(LIVE_PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.run_live_preview)
         content_splitter.addWidget(self.rule_editor)
         
         # Set initial splitter sizes
@@ -75,67 +173,287 @@ class DataTransformApp(QMainWindow):
         # Status bar
         self.statusBar = QStatusBar()
         self.setStatusBar(self.statusBar)
+        
+        # Progress of the running background stage
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(250)
+        self.progress_bar.hide()
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_worker)
+        self.cancel_btn.hide()
+        self.load_label = QLabel()
+        self.load_label.hide()
+        self.statusBar.addPermanentWidget(self.load_label)
+        self.statusBar.addPermanentWidget(self.progress_bar)
+        self.statusBar.addPermanentWidget(self.cancel_btn)
+    
+    def start_worker(self, task, on_result, description: str, run_log: RunLog = None) -> bool:
+        """Run task on a background thread; on_result receives its return value.
+        
+        Stages recorded in run_log are shown and logged once the task ends.
+        """
+        if self.worker is not None and self.worker.isRunning():
+            self.statusBar.showMessage("Another operation is still running")
+            return False
+        
+        self.current_run = run_log
+        self.profile_path = None
+        if self.profile_check.isChecked():
+            self.profile_check.setChecked(False)
+            self.profile_path = str(RUN_LOG_DIR / f"profile-{datetime.now():%Y%m%d-%H%M%S}.prof")
+        profile_path = self.profile_path
+        
+        def run(worker):
+            with profiled(profile_path):
+                return task(worker)
+            
+        self.worker = PipelineWorker(run, self)
+        self.worker.progress.connect(self.on_worker_progress)
+        self.worker.result_ready.connect(on_result)
+        self.worker.failed.connect(lambda message: self.statusBar.showMessage(f"Error: {message}"))
+        self.worker.cancelled.connect(lambda: self.statusBar.showMessage(f"{description} cancelled"))
+        self.worker.finished.connect(self.on_worker_finished)
+        
+        for button in self.action_buttons:
+            button.setEnabled(False)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.show()
+        self.statusBar.showMessage(f"{description}...")
+        self.worker.start()
+        return True
+    
+    def on_worker_progress(self, done: int, total: int):
+        if total > 0:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(done)
+        else:
+            # Unknown total: keep the busy indicator and show the row count
+            self.progress_bar.setRange(0, 0)
+            self.progress_bar.setFormat(f"{done} rows")
+    
+    def on_worker_finished(self):
+        for button in self.action_buttons:
+            button.setEnabled(True)
+        self.progress_bar.hide()
+        self.progress_bar.resetFormat()
+        self.cancel_btn.hide()
+        
+        if self.current_run is not None:
+            self.record_run(self.current_run)
+            self.current_run = None
+        if self.profile_path is not None:
+            self.statusBar.showMessage(f"{self.statusBar.currentMessage()} (profile saved to {self.profile_path})")
+            self.profile_path = None
+    
+    def record_run(self, run_log: RunLog):
+        self.run_stats.show_run(run_log)
+        try:
+            run_log.append_to(RUN_LOG_PATH)
+        except OSError:
+            pass  # the log is best effort; the panel still shows the run
+    
+    def loader_running(self) -> bool:
+        return self.loader is not None and self.loader.isRunning()
+    
+    def cancel_worker(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.statusBar.showMessage("Cancelling...")
 
     def import_files(self):
         files, _ = QFileDialog.getOpenFileNames(
             self,
             "Select Data Files",
             "",
-            "Data Files (*.csv *.xlsx);;CSV Files (*.csv);;Excel Files (*.xlsx)"
+            DATA_FILE_FILTER
         )
         if files:
-            # Clear existing data
-            self.source_data.clear()
-            self.preview_tabs.clear()
-            self.transformed_preview.clear()
+            def task(worker):
+                return read_files_parallel(files, progress_callback=worker.report, head_rows=PREVIEW_ROWS)
             
-            for file_path in files:
-                try:
-                    path = Path(file_path)
-                    if path.suffix == '.csv':
-                        df = pd.read_csv(file_path)
-                    else:
-                        df = pd.read_excel(file_path)
-                    
-                    self.source_data[path.name] = df
-                    
-                    # Create preview widget for the file
-                    preview = DataPreviewWidget()
-                    preview.set_data(df)
-                    self.preview_tabs.addTab(preview, path.name)
-                    
-                    self.statusBar.showMessage(f"Imported: {path.name}")
-                except Exception as e:
-                    self.statusBar.showMessage(f"Error importing {path.name}: {str(e)}")
+            self.start_worker(task, self.on_previews_loaded, "Reading file previews")
+    
+    def on_previews_loaded(self, results):
+        """Show the head of each file at once, then load the full files in the background"""
+        # Clear existing data
+        self.load_generation += 1
+        if self.loader_running():
+            self.loader.cancel()
+        self.apply_when_loaded = False
+        self.source_data.clear()
+        self.lean_files.clear()
+        self.preview_widgets.clear()
+        self.preview_tabs.clear()
+        self.transformed_preview.clear()
+        self.transformed_label.setText("Transformed Data")
+        self.preview_generation += 1
+        self.preview_sample = None
+        
+        heads = {}
+        messages = []
+        for loaded in results:
+            name = loaded.path.name
+            if loaded.error is not None:
+                messages.append(f"Error importing {name}: {loaded.error}")
+                continue
+            heads[name] = loaded.data
             
-            # Update rule editor with columns from first two files
-            if len(self.source_data) >= 2:
-                source_dfs = list(self.source_data.values())
-                self.rule_editor.update_columns(source_dfs[0], source_dfs[1])
+            # Create preview widget for the file
+            preview = DataPreviewWidget()
+            preview.set_data(loaded.data)
+            self.preview_tabs.addTab(preview, name)
+            self.preview_widgets[name] = preview
+        
+        # Columns are known from the heads, so rules can be built while the files load
+        if len(heads) >= 2:
+            self.rule_editor.update_files(heads)
+        if heads:
+            messages.insert(0, f"Previewing the first {PREVIEW_ROWS:,} rows; loading full files...")
+            self.start_loader([str(loaded.path) for loaded in results if loaded.error is None],
+                              self.lean_columns(heads) if self.lean_check.isChecked() else None)
+        self.statusBar.showMessage(" ".join(messages))
+    
+    def lean_columns(self, heads):
+        """Columns of each file the current rules read"""
+        self.transformer.match_rules = list(self.rule_editor.match_rules)
+        self.transformer.transform_rules = list(self.rule_editor.transform_rules)
+        try:
+            return self.transformer.required_columns({name: list(df.columns) for name, df in heads.items()})
+        except ValueError:
+            # Rules that do not fit these files yet; columns load when rules are applied
+            return {}
+    
+    def start_loader(self, file_paths, columns=None):
+        generation = self.load_generation
+        run_log = RunLog("import")
+        
+        def task(worker):
+            results = read_files_parallel(file_paths, progress_callback=worker.report, columns=columns,
+                                          cache=self.file_cache)
+            for loaded in results:
+                rows = len(loaded.data) if loaded.data is not None else 0
+                run_log.add(StageStats(f"import {loaded.path.name}", loaded.seconds, rows,
+                                       cached=loaded.cached, error=loaded.error))
+            return results
+        
+        self.loader = PipelineWorker(task, self)
+        self.loader.progress.connect(
+            lambda done, total: self.load_label.setText(f"Loading files: {done}/{total}"))
+        self.loader.result_ready.connect(
+            lambda results: self.on_files_imported(results, generation, run_log))
+        self.loader.failed.connect(lambda message: self.statusBar.showMessage(f"Error: {message}"))
+        self.loader.finished.connect(self.on_loader_finished)
+        self.load_label.setText(f"Loading files: 0/{len(file_paths)}")
+        self.load_label.show()
+        self.loader.start()
+    
+    def on_loader_finished(self):
+        # A superseded loader may finish after its replacement has started
+        if self.loader_running():
+            return
+        self.load_label.hide()
+        if self.apply_when_loaded:
+            self.apply_when_loaded = False
+            if self.source_data:
+                self.apply_rules()
+    
+    def on_files_imported(self, results, generation: int, run_log: RunLog):
+        if generation != self.load_generation:
+            return  # superseded by a newer import
+        
+        messages = []
+        for loaded in results:
+            name = loaded.path.name
+            if loaded.error is not None:
+                messages.append(f"Error importing {name}: {loaded.error}")
+                continue
+            self.source_data[name] = loaded.data
+            if loaded.lean is not None:
+                # The preview keeps the head, which shows every column
+                self.lean_files[name] = loaded.lean
+            else:
+                # The preview now pages through the whole file
+                self.preview_widgets[name].set_data(loaded.data)
+            messages.append(loaded.summary())
+        
+        self.statusBar.showMessage("Imported: " + ", ".join(messages))
+        self.record_run(run_log)
+        
+        # Update rule editor with the files and columns rules can refer to; lean
+        # files keep the columns of their heads
+        if len(self.source_data) >= 2 and not self.lean_files:
+            self.rule_editor.update_files(self.source_data)
+        self.schedule_live_preview()
 
     def apply_rules(self):
+        if self.loader_running():
+            self.apply_when_loaded = True
+            self.statusBar.showMessage("Rules will be applied as soon as the files finish loading")
+            return
         if not self.source_data:
             self.statusBar.showMessage("No source data to transform")
             return
             
-        try:
-            # Apply match rules between first two datasets
-            if len(self.source_data) >= 2:
-                source_dfs = list(self.source_data.values())
-                self.transformer.match_rules = self.rule_editor.match_rules
-                matched_data = self.transformer.match_records(source_dfs[0], source_dfs[1])
-                
-                # Apply transformations
-                self.transformer.transform_rules = self.rule_editor.transform_rules
-                self.transformed_data = self.transformer.apply_transformations(matched_data)
-                
-                # Update preview
-                self.transformed_preview.set_data(self.transformed_data)
-                self.statusBar.showMessage("Rules applied successfully")
-            else:
-                self.statusBar.showMessage("Need at least 2 datasets for matching")
-        except Exception as e:
-            self.statusBar.showMessage(f"Error applying rules: {str(e)}")
+        # Match rules join the first file to the second and any further files they name
+        if len(self.source_data) >= 2:
+            # A preview finishing later must not replace the full result
+            self.preview_timer.stop()
+            self.preview_generation += 1
+            frames = dict(self.source_data)
+            lean_files = dict(self.lean_files)
+            self.transformer.match_rules = list(self.rule_editor.match_rules)
+            self.transformer.transform_rules = list(self.rule_editor.transform_rules)
+            self.transformer.match_mode = self.mode_combo.currentData()
+            self.transformer.top_k = self.top_k_spin.value()
+            
+            run_log = RunLog("apply rules")
+            
+            def task(worker):
+                self.transformer.progress_callback = worker.report
+                self.transformer.run_log = run_log
+                try:
+                    if lean_files:
+                        return self.transformer.match_lean(lean_files)
+                    matched_data = self.transformer.match_files(frames)
+                    # Apply transformations
+                    return self.transformer.apply_transformations(matched_data)
+                finally:
+                    self.transformer.progress_callback = None
+                    self.transformer.run_log = None
+            
+            self.start_worker(task, self.on_rules_applied, "Applying rules", run_log)
+        else:
+            self.statusBar.showMessage("Need at least 2 datasets for matching")
+    
+    def on_rules_applied(self, transformed_data: pd.DataFrame):
+        self.transformed_data = transformed_data
+        # Lean files may have loaded columns that new rules refer to
+        for name, lean in self.lean_files.items():
+            self.source_data[name] = lean.frame
+        
+        # Update preview
+        self.transformed_preview.set_data(self.transformed_data)
+        self.transformed_label.setText("Transformed Data")
+        if self.transformer.last_match_cached:
+            self.statusBar.showMessage("Rules applied successfully (reused cached matches)")
+        elif self.transformer.last_match_incremental:
+            new_sources, new_targets = self.transformer.last_incremental_rows
+            self.statusBar.showMessage(
+                f"Rules applied successfully (matched {new_sources} new source rows, "
+                f"{new_targets} new target rows)"
+            )
+        else:
+            self.statusBar.showMessage("Rules applied successfully")
+        if self.transformer.last_transform_errors:
+            failed = ", ".join(rule.target_column or rule.transform_type
+                               for rule, _ in self.transformer.last_transform_errors)
+            self.statusBar.showMessage(f"{self.statusBar.currentMessage()}; transforms failed: {failed}")
+        if self.transformer.last_plan is not None:
+            # Hovering the status bar shows why a run took as long as it did
+            self.statusBar.setToolTip(self.transformer.last_plan.explain())
     
     def export_data(self):
         if self.transformed_data is None or self.transformed_data.empty:
@@ -146,23 +464,209 @@ class DataTransformApp(QMainWindow):
             self,
             "Save Transformed Data",
             "",
-            "CSV Files (*.csv);;Excel Files (*.xlsx)"
+            EXPORT_FILE_FILTER
+        )
+        if file_path:
+            data = self.transformed_data
+            name = Path(file_path).name
+            run_log = RunLog("export")
+            
+            def task(worker):
+                with run_log.stage(f"export {name}", len(data)):
+                    export_frame(data, file_path, worker.report)
+                
+            self.start_worker(
+                task,
+                lambda _: self.statusBar.showMessage(f"Data exported to: {name}"),
+                "Exporting data",
+                run_log
+            )
+    
+    def stream_match(self):
+        """Match a large source file against the loaded target without loading it"""
+        if self.loader_running():
+            self.statusBar.showMessage("Wait for the imported files to finish loading")
+            return
+        if self.mode_combo.currentData() in ('outer', 'anti'):
+            self.statusBar.showMessage(f"{self.mode_combo.currentText()} needs the whole source and cannot be streamed")
+            return
+        if len(self.source_data) < 2:
+            self.statusBar.showMessage("Import a sample of the source and the target file first")
+            return
+            
+        source_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select Source File to Stream",
+            "",
+            DATA_FILE_FILTER
+        )
+        if not source_path:
+            return
+        output_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Matched Data",
+            "",
+            EXPORT_FILE_FILTER
+        )
+        if output_path:
+            try:
+                graph = JoinGraph(self.rule_editor.match_rules, list(self.source_data))
+            except ValueError as e:
+                self.statusBar.showMessage(f"Error: {e}")
+                return
+            if not graph.is_pairwise:
+                self.statusBar.showMessage("Streaming supports match rules between two files only")
+                return
+            # The streamed file replaces the first file; the rules' target stays loaded
+            target_name = graph.edges[0].target_file if graph.edges else list(self.source_data)[1]
+            target_df = self.source_data[target_name]
+            target_lean = self.lean_files.get(target_name)
+            self.transformer.match_rules = list(self.rule_editor.match_rules)
+            self.transformer.transform_rules = list(self.rule_editor.transform_rules)
+            self.transformer.match_mode = self.mode_combo.currentData()
+            self.transformer.top_k = self.top_k_spin.value()
+            name = Path(output_path).name
+            run_log = RunLog("stream match")
+            
+            def task(worker):
+                self.transformer.progress_callback = worker.report
+                self.transformer.run_log = run_log
+                try:
+                    target = target_df
+                    if target_lean is not None:
+                        # Streamed rows need every target column
+                        target = target_lean.take(np.arange(len(target_df)))
+                    return stream_match_file(self.transformer, source_path, target, output_path)
+                finally:
+                    self.transformer.progress_callback = None
+                    self.transformer.run_log = None
+                    
+            self.start_worker(
+                task,
+                lambda rows: self.statusBar.showMessage(f"Streamed {rows} matched rows to: {name}"),
+                "Streaming match",
+                run_log
+            )
+    
+    def save_rules(self):
+        """Save the current rules in the format the command-line runner reads"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Rule Set",
+            "",
+            "Rule Sets (*.json)"
         )
         if file_path:
             try:
-                path = Path(file_path)
-                if path.suffix == '.csv':
-                    self.transformed_data.to_csv(file_path, index=False)
-                else:
-                    self.transformed_data.to_excel(file_path, index=False)
-                self.statusBar.showMessage(f"Data exported to: {path.name}")
+                self.rule_editor.update_rules()
+                save_rule_set(file_path, self.rule_editor.match_rules, self.rule_editor.transform_rules)
+                self.statusBar.showMessage(f"Rules saved to: {Path(file_path).name}")
             except Exception as e:
-                self.statusBar.showMessage(f"Error exporting data: {str(e)}")
+                self.statusBar.showMessage(f"Error saving rules: {str(e)}")
+    
+    def load_rules(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Load Rule Set",
+            "",
+            "Rule Sets (*.json)"
+        )
+        if file_path:
+            try:
+                match_rules, transform_rules = load_rule_set(file_path)
+                self.rule_editor.set_rules(match_rules, transform_rules)
+                self.statusBar.showMessage(f"Rules loaded from: {Path(file_path).name}")
+            except Exception as e:
+                self.statusBar.showMessage(f"Error loading rules: {str(e)}")
+    
+    def clear_file_cache(self):
+        try:
+            freed = self.file_cache.clear()
+        except OSError as e:
+            self.statusBar.showMessage(f"Error clearing the file cache: {e}")
+            return
+        self.statusBar.showMessage(f"Cleared {format_bytes(freed)} of cached files")
+    
+    def on_match_mode_changed(self):
+        self.top_k_spin.setEnabled(self.mode_combo.currentData() == 'top_k')
+        self.schedule_live_preview()
     
     def on_rules_updated(self):
         self.statusBar.showMessage("Rules updated")
+        self.schedule_live_preview()
+    
+    def schedule_live_preview(self):
+        """Preview the rules once edits pause; every edit restarts the wait"""
+        self.preview_generation += 1
+        self.preview_timer.start()
+    
+    def run_live_preview(self):
+        """Match and transform a sample of the source rows in the background"""
+        if len(self.source_data) < 2 or self.loader_running() or not self.rule_editor.match_rules:
+            return
+        if self.preview_worker is not None and self.preview_worker.isRunning():
+            # The transformer is busy; the newest rules run once the stale run stops
+            self.preview_worker.cancel()
+            self.preview_pending = True
+            return
+        
+        frames = dict(self.source_data)
+        source_name = next(iter(frames))
+        if self.preview_sample is None or self.preview_sample[0] is not frames[source_name]:
+            self.preview_sample = (frames[source_name],
+                                   stratified_sample(frames[source_name], LIVE_PREVIEW_ROWS))
+        # Every other file stays whole, so sampled rows find the same matches as a full run
+        frames[source_name] = sample = self.preview_sample[1]
+        transformer = self.preview_transformer
+        transformer.match_rules = list(self.rule_editor.match_rules)
+        transformer.transform_rules = list(self.rule_editor.transform_rules)
+        # Which target rows stay unmatched depends on every source row, not just the sample
+        mode = self.mode_combo.currentData()
+        transformer.match_mode = 'left' if mode in ('outer', 'anti') else mode
+        transformer.top_k = self.top_k_spin.value()
+        generation = self.preview_generation
+        
+        def task(worker):
+            start = time.perf_counter()
+            transformer.progress_callback = worker.report
+            try:
+                result = transformer.apply_transformations(transformer.match_files(frames))
+            finally:
+                transformer.progress_callback = None
+            return result, len(sample), time.perf_counter() - start
+        
+        self.preview_worker = PipelineWorker(task, self)
+        self.preview_worker.result_ready.connect(lambda result: self.on_live_preview(result, generation))
+        self.preview_worker.failed.connect(lambda message: self.on_live_preview_failed(message, generation))
+        self.preview_worker.finished.connect(self.on_live_preview_finished)
+        self.preview_worker.start()
+    
+    def on_live_preview(self, result, generation: int):
+        if generation != self.preview_generation:
+            return  # rules or data changed since this run started
+        transformed, sampled, seconds = result
+        self.transformed_preview.set_data(transformed)
+        self.transformed_label.setText(f"Transformed Data (preview of {sampled:,} sampled source rows)")
+        self.statusBar.showMessage(
+            f"Preview: {len(transformed):,} rows from {sampled:,} sampled source rows in "
+            f"{seconds * 1000:.0f} ms; Apply Rules to process all data"
+        )
+    
+    def on_live_preview_failed(self, message: str, generation: int):
+        # Half-edited rules often fail; only the latest edit's error is worth showing
+        if generation == self.preview_generation:
+            self.statusBar.showMessage(f"Preview failed: {message}")
+    
+    def on_live_preview_finished(self):
+        if self.preview_pending:
+            self.preview_pending = False
+            # A newer edit still waiting on the timer will start its own run
+            if not self.preview_timer.isActive():
+                self.run_live_preview()
 
 def main():
+    # Matching worker processes re-enter here when the app is frozen into an executable
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = DataTransformApp()
     window.show()
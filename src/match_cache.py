@@ -0,0 +1,87 @@
+import hashlib
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .rules import MatchRule
+
+# Per-row hashes by frame object; shared by the match cache and incremental matching
+_row_hashes: Dict[int, Tuple[weakref.ref, np.ndarray]] = {}
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """uint64 hash of every row's values, remembered while the frame is alive.
+    
+    Frames must not be modified in place once they have been hashed.
+    """
+    entry = _row_hashes.get(id(df))
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    key = id(df)
+    _row_hashes[key] = (weakref.ref(df, lambda _: _row_hashes.pop(key, None)), hashes)
+    return hashes
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a frame's columns, dtypes and values"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+    digest.update(row_hashes(df).tobytes())
+    return digest.hexdigest()
+
+def rules_key(rules: List[MatchRule]) -> Tuple:
+    """Order-independent key for a match rule list; averaging makes order irrelevant"""
+    return tuple(sorted(
+        (rule.source_column, rule.target_column, rule.match_type, round(rule.threshold, 6),
+         rule.case_sensitive, rule.blocking or '', tuple(sorted(rule.blocking_params.items())),
+         rule.source_file or '', rule.target_file or '',
+         rule.strip_whitespace, rule.strip_punctuation, rule.remove_accents)
+        for rule in rules
+    ))
+
+class MatchCache:
+    """LRU cache of matched frames keyed by input fingerprints and match rules.
+
+    Each entry also keeps the source and target row positions the frame was built from.
+    """
+
+    def __init__(self, max_entries: int = 8, max_bytes: int = 512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[pd.DataFrame, Tuple[np.ndarray, ...], int]]" = OrderedDict()
+
+    def key(self, source_df: pd.DataFrame, target_df: pd.DataFrame, rules: List[MatchRule]) -> Tuple:
+        return (frame_fingerprint(source_df), frame_fingerprint(target_df), rules_key(rules))
+
+    def get(self, key: Tuple) -> Optional[Tuple[pd.DataFrame, Tuple[np.ndarray, ...]]]:
+        """Matched frame and row positions, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0], entry[1]
+
+    def put(self, key: Tuple, matched: pd.DataFrame, positions: Tuple[Optional[np.ndarray], ...] = ()):
+        size = (int(matched.memory_usage(index=True, deep=True).sum())
+                + sum(p.nbytes for p in positions if p is not None))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.total_bytes -= self._entries.pop(key)[2]
+        self._entries[key] = (matched, positions, size)
+        self.total_bytes += size
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,174 @@
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from .rules import MatchRule
+
+@dataclass
+class PlanStep:
+    rule_index: int
+    rule: MatchRule
+    kind: str  # filter, exact, fuzzy
+    pairs_scored: int = 0
+
+    def describe(self) -> str:
+        rule = self.rule
+        text = f"{self.kind:<6} {rule.source_column} ~ {rule.target_column}"
+        if self.kind == 'fuzzy':
+            text += f" (threshold {rule.threshold:.2f})"
+        if not rule.case_sensitive:
+            text += " [case-insensitive]"
+        stripped = [name for name, enabled in (("whitespace", rule.strip_whitespace),
+                                               ("punctuation", rule.strip_punctuation),
+                                               ("accents", rule.remove_accents)) if enabled]
+        if stripped:
+            text += f" [strip {', '.join(stripped)}]"
+        if rule.blocking:
+            text += f" [blocking: {rule.blocking}]"
+        return text
+
+class MatchPlan:
+    """Match rules compiled once into an ordered execution plan.
+
+    Exact rules become hard filters when failing any one of them already makes
+    the minimum threshold unreachable; they are resolved by key lookup before
+    any scoring. Remaining exact rules are scored before fuzzy ones so that
+    candidates can be pruned as soon as their best achievable average can no
+    longer reach the threshold or beat the row's current best.
+    """
+
+    def __init__(self, rules: List[MatchRule]):
+        self.rules = list(rules)
+        n = len(self.rules)
+        self.min_threshold = min((rule.threshold for rule in self.rules), default=0.0)
+
+        # With n rules, failing one exact rule caps the average at (n - 1) / n
+        exact_filters = n > 0 and self.min_threshold > (n - 1) / n
+        self.filter_steps: List[PlanStep] = []
+        exact_steps, fuzzy_steps = [], []
+        for i, rule in enumerate(self.rules):
+            if rule.match_type == 'exact':
+                if exact_filters:
+                    self.filter_steps.append(PlanStep(i, rule, 'filter'))
+                else:
+                    exact_steps.append(PlanStep(i, rule, 'exact'))
+            else:
+                fuzzy_steps.append(PlanStep(i, rule, 'fuzzy'))
+        self.score_steps: List[PlanStep] = exact_steps + fuzzy_steps
+        self.blocked_rules = [i for i, rule in enumerate(self.rules) if rule.blocking]
+
+        # A pair can still average min_threshold when every other rule scores 1.0,
+        # so anything below this per-rule score is safe to drop while scoring
+        self.score_cutoff = max(0.0, (n * self.min_threshold - (n - 1)) * 100 - 1e-6)
+
+        if n == 0:
+            self.strategy = 'none'
+        elif not self.score_steps:
+            self.strategy = 'hash_join'
+        elif self.blocked_rules:
+            self.strategy = 'blocked'
+        elif self.filter_steps:
+            self.strategy = 'grouped'
+        else:
+            self.strategy = 'dense'
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.source_rows = 0
+        self.target_rows = 0
+        # Rows left once repeated key combinations are dropped; 0 when nothing repeated
+        self.distinct_source_rows = 0
+        self.distinct_target_rows = 0
+        self.pairs_considered = 0
+        self.pairs_pruned = 0
+        self.seconds = 0.0
+        for step in self.filter_steps + self.score_steps:
+            step.pairs_scored = 0
+
+    @property
+    def pairs_scored(self) -> int:
+        return sum(step.pairs_scored for step in self.score_steps)
+
+    def explain(self) -> str:
+        strategies = {
+            'none': "no match rules",
+            'hash_join': "hash join on exact keys, no scoring",
+            'blocked': "score each row against blocking candidates",
+            'grouped': "score each exact-key group against its target rows",
+            'dense': "score row blocks against every target row",
+        }
+        lines = [
+            f"Strategy: {self.strategy} ({strategies[self.strategy]})",
+            f"Minimum threshold: {self.min_threshold:.2f}, per-rule score cutoff: {self.score_cutoff:.1f}",
+        ]
+        for number, step in enumerate(self.filter_steps + self.score_steps, start=1):
+            line = f"  {number}. {step.describe()}"
+            if step.kind != 'filter' and self.pairs_considered:
+                line += f" - {step.pairs_scored:,} pairs scored"
+            lines.append(line)
+        if self.source_rows:
+            total = self.source_rows * self.target_rows
+            lines.append(
+                f"Last run: {self.source_rows:,} x {self.target_rows:,} rows ({total:,} pairs), "
+                f"{self.pairs_considered:,} candidate pairs, {self.pairs_pruned:,} pruned early, "
+                f"{self.seconds:.2f}s"
+            )
+            if self.distinct_source_rows or self.distinct_target_rows:
+                lines.append(
+                    f"Scored distinct keys only: {self.distinct_source_rows or self.source_rows:,} x "
+                    f"{self.distinct_target_rows or self.target_rows:,} rows"
+                )
+        return "\n".join(lines)
+
+@dataclass
+class JoinEdge:
+    source_file: str
+    target_file: str
+    rules: List[MatchRule]
+
+class JoinGraph:
+    """Match rules grouped into one edge per pair of files, ordered outward from the first file.
+
+    Rules without file names join the first file to the second, as with two
+    files. Each file can be joined in only once, so the edges form a tree
+    rooted at the first file and every result row holds one row of each file.
+    """
+
+    def __init__(self, rules: List[MatchRule], file_names: List[str]):
+        if not file_names:
+            raise ValueError("No files loaded")
+        self.root = file_names[0]
+        default_target = file_names[1] if len(file_names) > 1 else None
+        grouped: Dict[Tuple[str, str], List[MatchRule]] = {}
+        for rule in rules:
+            source = rule.source_file or self.root
+            target = rule.target_file or default_target
+            for name in (source, target):
+                if name not in file_names:
+                    raise ValueError(f"Match rule {rule.source_column} ~ {rule.target_column} "
+                                     f"refers to a file that is not loaded: {name}")
+            if source == target:
+                raise ValueError(f"Match rule {rule.source_column} ~ {rule.target_column} "
+                                 f"matches {source} against itself")
+            grouped.setdefault((source, target), []).append(rule)
+
+        joined_from: Dict[str, str] = {}
+        for source, target in grouped:
+            if target == self.root or target in joined_from:
+                raise ValueError(f"{target} is matched into the result more than once")
+            joined_from[target] = source
+
+        # Breadth-first, so every edge's source file is already part of the result
+        self.edges: List[JoinEdge] = []
+        self.files = [self.root]
+        for name in self.files:
+            for (source, target), edge_rules in grouped.items():
+                if source == name:
+                    self.edges.append(JoinEdge(source, target, edge_rules))
+                    self.files.append(target)
+        if len(self.edges) < len(grouped):
+            unreachable = sorted({source for source, _ in grouped} - set(self.files))
+            raise ValueError(f"Match rules from {', '.join(unreachable)} are not connected to {self.root}")
+
+    @property
+    def is_pairwise(self) -> bool:
+        """True when at most one edge joins the first file to one other file"""
+        return len(self.edges) <= 1
@@ -0,0 +1,193 @@
+"""Partitioned matching across worker processes.
+
+The parent encodes the source keys against its target index and writes the
+target arrays scoring reads (exact-rule codes, fuzzy-rule strings and the
+filter key groups) once to a temporary Arrow IPC file. Every worker
+memory-maps that file, so the numeric arrays are pages shared read-only by
+all workers and strings are decoded only for the candidates a block scores.
+Built blocking indexes are pickled once next to it instead of being rebuilt
+per worker. Tasks carry one contiguous shard of the encoded source, and
+results are stitched back together in shard order, giving exactly the result
+of a single-process run.
+"""
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pyarrow as pa
+from .data_model import DataTransformer, EncodedSource, MatchResult, TargetIndex
+from .match_plan import MatchPlan
+from .rules import MatchRule
+
+# Shards per worker, so one slow shard does not leave the other cores idle at the end
+SHARDS_PER_WORKER = 4
+# Row-aligned target arrays, and the start of each filter key group
+TARGET_FILE = 'target.arrow'
+GROUPS_FILE = 'groups.arrow'
+
+# Per-process state set up by _init_worker
+_transformer: Optional[DataTransformer] = None
+_index: Optional['SharedTargetIndex'] = None
+
+def _write_arrays(path: str, arrays: Dict[str, pa.Array]):
+    table = pa.table(arrays)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+def write_target_index(index: TargetIndex, directory: str):
+    """Store the arrays workers score against in directory"""
+    arrays = {}
+    for i, (rule, values) in enumerate(zip(index.rules, index.values)):
+        arrays[f"rule_{i}"] = pa.array(values, type=pa.int64() if rule.match_type == 'exact' else pa.large_string())
+    if index.filter_keys is not None:
+        arrays['filter_codes'] = pa.array(index.filter_codes, type=pa.int64())
+        arrays['group_order'] = pa.array(index.group_order, type=pa.int64())
+        _write_arrays(os.path.join(directory, GROUPS_FILE),
+                      {'group_starts': pa.array(index.group_starts, type=pa.int64())})
+    _write_arrays(os.path.join(directory, TARGET_FILE), arrays)
+    for i, candidate_index in index.blocking:
+        with open(os.path.join(directory, f"blocking_{i}.pickle"), 'wb') as f:
+            pickle.dump(candidate_index, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+class SharedStrings:
+    """Fuzzy-rule target strings in a memory-mapped Arrow array, decoded on access"""
+
+    def __init__(self, array: pa.Array):
+        self.array = array
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, positions: np.ndarray) -> np.ndarray:
+        return self.array.take(pa.array(positions, type=pa.int64())).to_numpy(zero_copy_only=False)
+
+class SharedTargetIndex:
+    """The parts of a TargetIndex that scoring reads, backed by the memory-mapped file"""
+    group_rows = TargetIndex.group_rows
+
+    def __init__(self, directory: str, rules: List[MatchRule]):
+        self.plan = MatchPlan(rules)
+        self.rules = self.plan.rules
+        # Kept open for the life of the worker: the arrays below are views of these maps
+        self._maps = []
+        table = self._read(os.path.join(directory, TARGET_FILE))
+        self.size = table.num_rows
+        self.values = [
+            self._column(table, f"rule_{i}") if rule.match_type == 'exact'
+            else SharedStrings(table.column(f"rule_{i}").combine_chunks())
+            for i, rule in enumerate(self.rules)
+        ]
+        if self.plan.filter_steps:
+            self.filter_codes = self._column(table, 'filter_codes')
+            self.group_order = self._column(table, 'group_order')
+            self.group_starts = self._column(self._read(os.path.join(directory, GROUPS_FILE)), 'group_starts')
+        self.blocking = []
+        for i in self.plan.blocked_rules:
+            with open(os.path.join(directory, f"blocking_{i}.pickle"), 'rb') as f:
+                self.blocking.append((i, pickle.load(f)))
+
+    def _read(self, path: str) -> pa.Table:
+        source = pa.memory_map(path)
+        self._maps.append(source)
+        return pa.ipc.open_file(source).read_all()
+
+    @staticmethod
+    def _column(table: pa.Table, name: str) -> np.ndarray:
+        # Zero-copy: integers without nulls are used straight from the mapped pages
+        return table.column(name).combine_chunks().to_numpy()
+
+    def __len__(self):
+        return self.size
+
+def _init_worker(directory: str, rules: List[MatchRule], score_chunk_bytes: int):
+    global _transformer, _index
+    _transformer = DataTransformer()
+    _transformer.match_cache = None
+    _transformer.score_chunk_bytes = score_chunk_bytes
+    # Every core already runs its own worker
+    _transformer.score_workers = 1
+    _index = SharedTargetIndex(directory, rules)
+
+def _match_shard(shard: EncodedSource, k: int):
+    plan = _index.plan
+    plan.reset_stats()
+    result = _transformer.score_encoded(shard, _index, k)
+    stats = (plan.pairs_considered, plan.pairs_pruned,
+             [step.pairs_scored for step in plan.filter_steps + plan.score_steps])
+    return result, stats
+
+def _shutdown(pool: ProcessPoolExecutor, directory: str):
+    # Shards already running finish in the background; queued ones are dropped
+    pool.shutdown(wait=False, cancel_futures=True)
+    shutil.rmtree(directory, ignore_errors=True)
+
+class ParallelMatcher:
+    """Process pool holding one target index's arrays, reusable for any number of source frames.
+
+    key identifies the target content and rules the arrays were built from.
+    """
+
+    def __init__(self, index: TargetIndex, key: Tuple, workers: Optional[int] = None,
+                 score_chunk_bytes: int = 64 * 1024 * 1024):
+        self.key = key
+        self.workers = workers or os.cpu_count() or 1
+        self._directory = tempfile.mkdtemp(prefix='match-target-')
+        try:
+            write_target_index(index, self._directory)
+        except BaseException:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            raise
+        # Forking a process that runs Qt threads is unsafe, and spawn is all Windows has
+        self._pool = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(self._directory, index.rules, score_chunk_bytes),
+        )
+        self._finalizer = weakref.finalize(self, _shutdown, self._pool, self._directory)
+
+    def match(self, encoded: EncodedSource, plan: MatchPlan,
+              progress_callback: Optional[Callable[[int, int], None]] = None, k: int = 1) -> MatchResult:
+        """Match encoded source rows shard by shard, keeping up to k candidates per row.
+
+        Plan statistics are summed into plan.
+        """
+        shards = min(len(encoded), self.workers * SHARDS_PER_WORKER)
+        bounds = np.linspace(0, len(encoded), shards + 1).astype(np.int64)
+        # Workers only look up the normalized strings of blocked rules
+        futures = {
+            self._pool.submit(_match_shard, encoded.slice(start, stop, plan.blocked_rules), k): i
+            for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:]))
+        }
+        results = [None] * shards
+        pending = set(futures)
+        rows_done = 0
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    shard = futures[future]
+                    results[shard] = future.result()
+                    rows_done += int(bounds[shard + 1] - bounds[shard])
+                if progress_callback is not None:
+                    progress_callback(rows_done, len(encoded))
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+        parts = []
+        steps = plan.filter_steps + plan.score_steps
+        for offset, (result, (considered, pruned, step_pairs)) in zip(bounds[:-1], results):
+            parts.append(MatchResult(result.source_pos + offset, result.target_pos, result.scores, result.ranks))
+            plan.pairs_considered += considered
+            plan.pairs_pruned += pruned
+            for step, pairs in zip(steps, step_pairs):
+                step.pairs_scored += pairs
+        return MatchResult.concat(parts)
+
+    def close(self):
+        self._finalizer()
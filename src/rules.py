@@ -0,0 +1,57 @@
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Kept free of pandas and Qt imports so rule sets load instantly in batch jobs
+RULE_SET_VERSION = 1
+# What a pairwise match outputs: the best target per source row, the k best with
+# their rank and score, every source row (left), every row of both files (outer),
+# or the target rows no source row matched (anti)
+MATCH_MODES = ('best', 'top_k', 'left', 'outer', 'anti')
+
+@dataclass
+class MatchRule:
+    source_column: str
+    target_column: str
+    match_type: str  # exact, fuzzy
+    threshold: float = 0.9  # for fuzzy matching
+    case_sensitive: bool = False
+    blocking: Optional[str] = None  # qgram, sorted_neighbourhood, prefix, phonetic
+    blocking_params: Dict[str, Any] = field(default_factory=dict)
+    # Loaded file names; None means the first (source) and second (target) file
+    source_file: Optional[str] = None
+    target_file: Optional[str] = None
+    # Normalization applied to both columns before comparing
+    strip_whitespace: bool = False  # trim and collapse runs of whitespace
+    strip_punctuation: bool = False
+    remove_accents: bool = False
+
+@dataclass
+class TransformRule:
+    source_columns: List[str]
+    target_column: str
+    transform_type: str  # date_format, number_format, concatenate, etc.
+    parameters: Dict[str, Any]
+
+def rule_set_to_dict(match_rules: List[MatchRule], transform_rules: List[TransformRule]) -> Dict[str, Any]:
+    return {
+        'version': RULE_SET_VERSION,
+        'match_rules': [asdict(rule) for rule in match_rules],
+        'transform_rules': [asdict(rule) for rule in transform_rules],
+    }
+
+def rule_set_from_dict(data: Dict[str, Any]) -> Tuple[List[MatchRule], List[TransformRule]]:
+    version = data.get('version', RULE_SET_VERSION)
+    if version > RULE_SET_VERSION:
+        raise ValueError(f"Rule set version {version} is newer than supported ({RULE_SET_VERSION})")
+    match_rules = [MatchRule(**rule) for rule in data.get('match_rules', [])]
+    transform_rules = [TransformRule(**rule) for rule in data.get('transform_rules', [])]
+    return match_rules, transform_rules
+
+def save_rule_set(file_path: str, match_rules: List[MatchRule], transform_rules: List[TransformRule]):
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(rule_set_to_dict(match_rules, transform_rules), f, indent=2)
+
+def load_rule_set(file_path: str) -> Tuple[List[MatchRule], List[TransformRule]]:
+    with open(file_path, encoding='utf-8') as f:
+        return rule_set_from_dict(json.load(f))
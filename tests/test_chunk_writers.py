@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from src.data_model import OperationCancelled
+from src.file_io import export_frame, open_chunk_writer, read_data_file
+
+SUFFIXES = [".csv", ".parquet", ".feather", ".xlsx"]
+
+@pytest.mark.parametrize("suffix", SUFFIXES)
+def test_column_empty_in_first_chunk(tmp_path, suffix):
+    # Streamed Excel chunks type a column with no values as null
+    chunks = [pd.DataFrame({"id": [1, 2], "note": [None, None]}).convert_dtypes(dtype_backend="pyarrow"),
+              pd.DataFrame({"id": [3, 4], "note": ["x", None]}).convert_dtypes(dtype_backend="pyarrow")]
+    path = tmp_path / f"out{suffix}"
+    with open_chunk_writer(str(path)) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    assert read_data_file(str(path))["note"].tolist() == [pd.NA, pd.NA, "x", pd.NA]
+
+@pytest.mark.parametrize("reader", [pd.read_parquet, pd.read_feather])
+def test_empty_column_round_trip(tmp_path, reader):
+    # A loaded CSV column with no values is null[pyarrow]
+    source = tmp_path / "in.csv"
+    source.write_text("id,note\n1,\n2,\n")
+    df = read_data_file(str(source))
+    path = tmp_path / ("out.parquet" if reader is pd.read_parquet else "out.feather")
+    export_frame(df, str(path))
+    assert reader(path)["note"].isna().all()
+    assert reader(path, dtype_backend="pyarrow")["note"].isna().all()
+
+@pytest.mark.parametrize("suffix", SUFFIXES)
+def test_cancelled_export_keeps_previous_output(tmp_path, suffix):
+    path = tmp_path / f"out{suffix}"
+    export_frame(pd.DataFrame({"id": range(5)}), str(path))
+
+    def cancel(done, total):
+        if done >= 300:
+            raise OperationCancelled()
+
+    with pytest.raises(OperationCancelled):
+        export_frame(pd.DataFrame({"id": range(1000)}), str(path), cancel, chunksize=100)
+    assert len(read_data_file(str(path))) == 5
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
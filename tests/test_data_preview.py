@@ -0,0 +1,19 @@
+import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from src.gui.data_preview import filter_mask
+
+DATES = [datetime.date(2020, 1, 1), None, datetime.date(2021, 5, 3)]
+
+@pytest.mark.parametrize("values", [
+    pd.Series(pd.array(DATES, dtype=pd.ArrowDtype(pa.date32()))),
+    pd.Series(pd.array(DATES, dtype=pd.ArrowDtype(pa.date64()))),
+    pd.Series(pd.to_datetime(DATES)),
+    pd.Series(pd.to_datetime(DATES)).dt.tz_localize("UTC"),
+    pd.Series(pd.to_datetime(DATES)).astype("category"),
+])
+def test_date_comparison_filter(values):
+    assert filter_mask(values, ">= 2020-06-01").tolist() == [False, False, True]
+    assert filter_mask(values, "< 2020-06-01").tolist() == [True, False, False]
@@ -0,0 +1,32 @@
+import threading
+import time
+
+import pytest
+from src import file_io
+from src.data_model import OperationCancelled
+
+def test_cancel_abandons_running_reads(tmp_path, monkeypatch):
+    release = threading.Event()
+    started = []
+
+    def slow_read(file_path, *args):
+        started.append(file_path)
+        release.wait(10)
+        return None
+
+    monkeypatch.setattr(file_io, "_timed_read", slow_read)
+
+    def cancel(done, total):
+        raise OperationCancelled()
+
+    paths = [str(tmp_path / f"{i}.csv") for i in range(4)]
+    start = time.perf_counter()
+    try:
+        with pytest.raises(OperationCancelled):
+            file_io.read_files_parallel(paths, max_workers=1, progress_callback=cancel)
+        assert time.perf_counter() - start < 5
+    finally:
+        release.set()
+    # Queued reads never start
+    time.sleep(0.2)
+    assert started == paths[:1]
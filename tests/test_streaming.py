@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+from src.data_model import DataTransformer
+from src.file_io import read_data_file, stream_match_file
+from src.rules import MatchRule
+
+SOURCE = "id,name\n1,a\n2,b\n3,c\n,d\n4,e\n"
+TARGET = "id,city\n1,x\n2,y\n3,z\n4,w\n"
+
+def _transformer(mode: str) -> DataTransformer:
+    transformer = DataTransformer()
+    transformer.match_rules = [MatchRule("id", "id", "exact")]
+    transformer.match_mode = mode
+    return transformer
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".xlsx"])
+@pytest.mark.parametrize("mode", ["best", "left"])
+def test_stream_matches_full_load(tmp_path, suffix, mode):
+    # The blank id makes the second chunk's id column differ from the first if typed per chunk
+    source_path, target_path = tmp_path / f"source{suffix}", tmp_path / "target.csv"
+    source = pd.read_csv(pd.io.common.StringIO(SOURCE), dtype_backend="pyarrow")
+    if suffix == ".csv":
+        source_path.write_text(SOURCE)
+    elif suffix == ".parquet":
+        source.to_parquet(source_path)
+    else:
+        source.to_excel(source_path, index=False)
+    target_path.write_text(TARGET)
+    target = read_data_file(str(target_path))
+
+    expected = _transformer(mode).match_records(read_data_file(str(source_path)), target)
+    output_path = tmp_path / "out.csv"
+    rows = stream_match_file(_transformer(mode), str(source_path), target, str(output_path), chunksize=3)
+    streamed = pd.read_csv(output_path, dtype_backend="pyarrow")
+
+    assert rows == len(expected)
+    assert streamed.astype(str).values.tolist() == expected.astype(str).values.tolist()
+
+# Repetitive keys load as categoricals and distinct keys as strings; streamed chunks stay strings
+REPEATED_KEYS = "key,left\na,1\nb,2\n,3\nc,4\n,5\na,6\n"
+DISTINCT_KEYS = "key,right\na,x\n,y\nb,z\nc,w\n"
+
+@pytest.mark.parametrize("source_text,target_text", [(REPEATED_KEYS, DISTINCT_KEYS), (DISTINCT_KEYS, REPEATED_KEYS)])
+def test_missing_keys_match_alike_in_stream_and_full_load(tmp_path, source_text, target_text):
+    source_path, target_path = tmp_path / "source.csv", tmp_path / "target.csv"
+    source_path.write_text(source_text)
+    target_path.write_text(target_text)
+    target = read_data_file(str(target_path))
+    transformer = DataTransformer()
+    transformer.match_rules = [MatchRule("key", "key", "exact")]
+
+    expected = transformer.match_records(read_data_file(str(source_path)), target)
+    output_path = tmp_path / "out.csv"
+    rows = stream_match_file(transformer, str(source_path), target, str(output_path), chunksize=2)
+    streamed = pd.read_csv(output_path, dtype_backend="pyarrow")
+
+    # Every key, missing ones included, is in both files
+    assert len(expected) == len(source_text.splitlines()) - 1
+    assert rows == len(expected)
+    assert streamed.astype(str).values.tolist() == expected.astype(str).values.tolist()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.file_io import export_frame, read_columns, read_data_file, take_rows
+
+COLUMNS = ["score", "code", "name", "note", "id"]
+# Unsorted and repeated positions spanning several chunks; the codes taken are all distinct
+POSITIONS = np.array([17, 3, 3, 0, 19, 8, 4])
+
+def _write(tmp_path, suffix: str) -> str:
+    df = pd.DataFrame({
+        "id": np.arange(20),
+        # Repetitive over the whole file, so a full load makes it categorical
+        "code": [f"c{i % 5}" if i % 7 else None for i in range(20)],
+        "name": [f"name {i}" if i % 4 else None for i in range(20)],
+        "note": [None] * 20,
+        "score": np.linspace(0, 1, 20),
+        "unused": "x",
+    })
+    path = str(tmp_path / f"data{suffix}")
+    export_frame(df, path)
+    return path
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".feather", ".xlsx"])
+def test_take_rows_matches_full_load(tmp_path, suffix):
+    path = _write(tmp_path, suffix)
+    expected = read_data_file(path)[COLUMNS].take(POSITIONS).reset_index(drop=True)
+    pd.testing.assert_frame_equal(take_rows(path, COLUMNS, POSITIONS, chunksize=3), expected)
+    with pytest.raises(IndexError):
+        take_rows(path, COLUMNS, np.array([20]), chunksize=3)
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".feather", ".xlsx"])
+def test_take_rows_uncompacted(tmp_path, suffix):
+    path = _write(tmp_path, suffix)
+    expected = read_columns(path, COLUMNS, compact=False).take(POSITIONS).reset_index(drop=True)
+    pd.testing.assert_frame_equal(take_rows(path, COLUMNS, POSITIONS, compact=False, chunksize=3), expected)